@@ -0,0 +1,337 @@
+# controller/component_store.py
+import itertools
+
+import numpy as np
+import pandas as pd
+
+# Typed columns every inventory carries. Any other key a component dict brings
+# along (e.g. "Original Risk Score") is kept in an extra object column.
+COMPONENT_COLUMNS = {
+    "Name": np.dtype(object),
+    "Category": np.dtype(object),
+    "Spend": np.dtype("float64"),
+    "Revenue Impact %": np.dtype("float64"),
+    "Risk Score": np.dtype("float64"),
+    "Renewal Date": np.dtype("datetime64[ns]"),
+    "System": np.dtype(object),
+}
+
+_MIN_CAPACITY = 16
+
+# Shared across stores so a version number is never reused, even when a
+# session swaps in a fresh controller
+_versions = itertools.count(1)
+
+
+def _missing_value(dtype):
+    if dtype.kind == "f":
+        return np.nan
+    if dtype.kind == "M":
+        return np.datetime64("NaT", "ns")
+    return None
+
+
+def _is_missing(value):
+    if value is None or value is pd.NaT or value is pd.NA:
+        return True
+    if isinstance(value, (float, np.floating)):
+        return value != value
+    if isinstance(value, np.datetime64):
+        return np.isnat(value)
+    return False
+
+
+def _coerce_scalar(value, dtype):
+    if _is_missing(value):
+        return _missing_value(dtype)
+    if dtype.kind == "f":
+        try:
+            return float(value.replace(",", "").replace("$", "").replace("%", "")) if isinstance(value, str) else float(value)
+        except (TypeError, ValueError):
+            return np.nan
+    if dtype.kind == "M":
+        try:
+            return np.datetime64(value, "ns")
+        except (TypeError, ValueError):
+            return pd.to_datetime(value, errors="coerce").to_datetime64()
+    return value
+
+
+def _coerce_series(series, dtype):
+    if dtype.kind == "f":
+        if not pd.api.types.is_numeric_dtype(series.dtype):
+            series = series.astype(str).str.replace(r"[,$%\s]", "", regex=True).where(series.notna())
+        return pd.to_numeric(series, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    if dtype.kind == "M":
+        return pd.to_datetime(series, errors="coerce").to_numpy(dtype="datetime64[ns]")
+    return series.astype(object).where(series.notna(), None).to_numpy(dtype=object)
+
+
+def _count_rejected(series, values):
+    """Cells that held a value but came out of coercion missing."""
+    present = series.notna() & (series.astype(str).str.strip() != "")
+    return int((present.to_numpy() & pd.isna(values)).sum())
+
+
+def _to_python(column):
+    """Convert a stored column back into the plain values component dicts hold."""
+    if column.dtype.kind == "f":
+        # Forms and CSVs hand us whole-dollar spends and integer scores
+        return [int(v) if v.is_integer() else v for v in column.tolist()]
+    if column.dtype.kind == "M":
+        return np.datetime_as_string(column, unit="D").tolist()
+    return column.tolist()
+
+
+class CategoryAggregates:
+    """Running per-category totals, adjusted in O(1) as single rows change.
+
+    Missing spend, impact and risk values count as 0, matching the
+    ``comp.get(key, 0)`` convention the rollups were written with.
+    """
+
+    FIELDS = ("count", "spend", "impact_sum", "impact_count", "risk_sum", "risk_weighted")
+
+    def __init__(self):
+        self.by_category = {}
+
+    def clear(self):
+        self.by_category = {}
+
+    def _bucket(self, category):
+        if category not in self.by_category:
+            self.by_category[category] = dict.fromkeys(self.FIELDS, 0.0)
+        return self.by_category[category]
+
+    def add_row(self, category, spend, impact, risk, sign=1):
+        bucket = self._bucket(category)
+        impact_known = impact == impact
+        spend = spend if spend == spend else 0.0
+        impact = impact if impact_known else 0.0
+        risk = risk if risk == risk else 0.0
+        bucket["count"] += sign
+        bucket["spend"] += sign * float(spend)
+        bucket["impact_sum"] += sign * impact
+        bucket["impact_count"] += sign * impact_known
+        bucket["risk_sum"] += sign * risk
+        bucket["risk_weighted"] += sign * impact * risk / 100
+        if bucket["count"] <= 0:
+            del self.by_category[category]
+
+    def add_columns(self, categories, spend, impact, risk):
+        """Fold a batch of rows in with one groupby instead of row by row."""
+        frame = pd.DataFrame({
+            "category": pd.Series(categories, dtype=object).fillna("\0missing"),
+            "count": 1.0,
+            "spend": np.nan_to_num(spend),
+            "impact_sum": np.nan_to_num(impact),
+            "impact_count": (~np.isnan(impact)).astype(float),
+            "risk_sum": np.nan_to_num(risk),
+            "risk_weighted": np.nan_to_num(impact) * np.nan_to_num(risk) / 100,
+        })
+        for category, sums in frame.groupby("category", sort=False).sum().iterrows():
+            bucket = self._bucket(None if category == "\0missing" else category)
+            for field in self.FIELDS:
+                bucket[field] += float(sums[field])
+
+    def totals(self):
+        combined = dict.fromkeys(self.FIELDS, 0.0)
+        for bucket in self.by_category.values():
+            for field in self.FIELDS:
+                combined[field] += bucket[field]
+        return combined
+
+
+class ComponentStore:
+    """Columnar component inventory.
+
+    Each field lives in its own NumPy array with spare capacity, so appends are
+    amortised O(1) and pages can get a DataFrame over the live arrays without
+    converting a list of dicts on every rerun.
+    """
+
+    def __init__(self, records=None):
+        self._size = 0
+        self._capacity = 0
+        self._columns = {name: np.empty(0, dtype=dtype) for name, dtype in COMPONENT_COLUMNS.items()}
+        self._version = next(_versions)
+        self._records_cache = None
+        self.aggregates = CategoryAggregates()
+        if records is not None:
+            self.extend(records)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def version(self):
+        """Monotonically increasing counter bumped on every mutation."""
+        return self._version
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    @property
+    def dtypes(self):
+        return {name: column.dtype for name, column in self._columns.items()}
+
+    # --- Internal helpers ---
+    def _touch(self):
+        self._version = next(_versions)
+        self._records_cache = None
+
+    def _reserve(self, needed):
+        if needed <= self._capacity:
+            return
+        capacity = max(needed, self._capacity * 2, _MIN_CAPACITY)
+        for name, old in self._columns.items():
+            grown = np.full(capacity, _missing_value(old.dtype), dtype=old.dtype)
+            grown[:self._size] = old[:self._size]
+            self._columns[name] = grown
+        self._capacity = capacity
+
+    def _add_column(self, name):
+        self._columns[name] = np.full(self._capacity, None, dtype=object)
+
+    def _aggregate_row(self, index, sign):
+        columns = self._columns
+        self.aggregates.add_row(
+            columns["Category"][index],
+            columns["Spend"][index],
+            columns["Revenue Impact %"][index],
+            columns["Risk Score"][index],
+            sign,
+        )
+
+    # --- Mutation ---
+    def clear(self):
+        self._size = 0
+        self._capacity = 0
+        self._columns = {name: np.empty(0, dtype=dtype) for name, dtype in COMPONENT_COLUMNS.items()}
+        self.aggregates.clear()
+        self._touch()
+
+    def append(self, record):
+        self._reserve(self._size + 1)
+        for key in record:
+            if key not in self._columns:
+                self._add_column(key)
+        row = self._size
+        for name, column in self._columns.items():
+            column[row] = _coerce_scalar(record.get(name), column.dtype)
+        self._size += 1
+        self._aggregate_row(row, +1)
+        self._touch()
+        return row
+
+    def extend(self, records):
+        if not isinstance(records, pd.DataFrame):
+            # One conversion up front is far cheaper than coercing dict by dict
+            records = list(records)
+            frame = pd.DataFrame.from_records(records)
+            # from_records turns an int field some dicts lack into floats
+            # (7 -> 7.0); extra fields keep the values the dicts held
+            for key in frame.columns:
+                if key not in COMPONENT_COLUMNS and frame[key].dtype.kind == "f":
+                    frame[key] = pd.Series([record.get(key) for record in records], index=frame.index, dtype=object)
+            records = frame
+        return self.extend_frame(records)
+
+    def extend_frame(self, frame):
+        """Append every row of ``frame`` column-by-column, without going through dicts.
+
+        Returns ``{column: cells}`` for values that couldn't be converted to
+        the column's type (e.g. "High" as a Risk Score, an unreadable
+        Renewal Date) and were stored as missing.
+        """
+        count = len(frame)
+        rejected = {}
+        if count == 0:
+            return rejected
+        self._reserve(self._size + count)
+        for key in frame.columns:
+            if key not in self._columns:
+                self._add_column(key)
+        start, stop = self._size, self._size + count
+        for name, column in self._columns.items():
+            if name in frame.columns:
+                values = _coerce_series(frame[name], column.dtype)
+                column[start:stop] = values
+                if column.dtype.kind in "fM":
+                    failed = _count_rejected(frame[name], values)
+                    if failed:
+                        rejected[name] = failed
+            else:
+                column[start:stop] = _missing_value(column.dtype)
+        self._size = stop
+        self.aggregates.add_columns(
+            self._columns["Category"][start:stop],
+            self._columns["Spend"][start:stop],
+            self._columns["Revenue Impact %"][start:stop],
+            self._columns["Risk Score"][start:stop],
+        )
+        self._touch()
+        return rejected
+
+    def replace(self, records):
+        self.clear()
+        return self.extend(records)
+
+    def update(self, index, changes):
+        """Overwrite fields of the component at ``index``; returns the previous values."""
+        if not 0 <= index < self._size:
+            raise IndexError(f"Component index {index} out of range")
+        previous = {}
+        self._aggregate_row(index, -1)
+        for key, value in changes.items():
+            if key not in self._columns:
+                self._add_column(key)
+            column = self._columns[key]
+            previous[key] = column[index]
+            column[index] = _coerce_scalar(value, column.dtype)
+        self._aggregate_row(index, +1)
+        self._touch()
+        return previous
+
+    # --- Read access ---
+    def column(self, name):
+        """Read-only view of the live values of one column."""
+        view = self._columns[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+    def find(self, name):
+        """Index of the first component called ``name`` or ``None``."""
+        matches = np.flatnonzero(self.column("Name") == name)
+        return int(matches[0]) if len(matches) else None
+
+    def to_frame(self, copy=True):
+        """DataFrame of the inventory, built column by column from the arrays.
+
+        By default each column is copied (one memcpy per column), so callers
+        can edit the frame freely, ``df.loc[...] = ...`` included, without
+        touching the store. ``copy=False`` returns read-only views instead,
+        for internal readers that never write to the frame.
+        """
+        return pd.DataFrame(
+            {name: pd.Series(self.column(name), dtype=dtype, copy=copy) for name, dtype in self.dtypes.items()},
+            copy=False,
+        )
+
+    def to_records(self):
+        """List of component dicts, cached until the next mutation.
+
+        Missing fields are left out of each dict so ``comp.get(key, default)``
+        keeps behaving the way it did with the plain list.
+        """
+        if self._records_cache is None:
+            fields = []
+            for name in self._columns:
+                column = self.column(name)
+                fields.append((name, _to_python(column), pd.isna(column).tolist()))
+            self._records_cache = [
+                {name: values[i] for name, values, missing in fields if not missing[i]}
+                for i in range(self._size)
+            ]
+        return self._records_cache
@@ -1,64 +1,142 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
+from controller import simulation, sweep
+from controller.component_store import ComponentStore
 
 class ITRMController:
     def __init__(self):
-        self.components = []
+        self._store = ComponentStore()
         self.edges = []
         self.simulation_results = {}
         self.forecast_model = {}
         self.financial_summary = {}
+
+    @property
+    def components(self):
+        return list(self._store.to_records())
+
+    @components.setter
+    def components(self, components_list):
+        self.set_components(components_list)
    
+    @property
+    def data_version(self):
+        """Increases on every change to the component inventory."""
+        return self._store.version
+
     def get_components(self):
-            return self.components
+        # Shallow copy so callers appending to it can't desync the cached records
+        return list(self._store.to_records())
+
+    def get_components_df(self):
+        """DataFrame of the component inventory; a copy the caller may edit."""
+        return self._store.to_frame()
+
+    def component_count(self):
+        return len(self._store)
 
     def set_components(self, components_list):
-        self.components = components_list
+        # Accepts a list of component dicts or a DataFrame with component columns.
+        # Returns {column: cells} for values that couldn't be converted and were left blank
+        return self._store.replace(components_list)
     
     def add_component(self, component):
-        self.components.append(component)
+        self._store.append(component)
+
+    def clear_components(self):
+        self._store.clear()
+
+    def swap_component_store(self, store):
+        """Replace the whole inventory with a fully loaded ComponentStore in one step."""
+        self._store = store
+
+    def find_component(self, name):
+        """Index of the first component with this Name, or None."""
+        return self._store.find(name)
+
+    def update_component(self, index, changes):
+        """Apply field changes (e.g. {"Risk Score": 6}) to the component at ``index``."""
+        self._store.update(index, changes)
 
     def add_edge(self, source, target):
         self.edges.append((source, target))
 
-    def run_simulation(self):
-        # Estimate revenue at risk using a simple model
-        risk_data = []
-        for c in self.components:
-            revenue_at_risk = (c["Revenue Impact %"] * c["Risk Score"]) / 100
-            risk_data.append({
-                "Component": c["Name"],
-                "Revenue at Risk (%)": revenue_at_risk
-            })
-        self.simulation_results = pd.DataFrame(risk_data)
+    def run_simulation(self, scenarios=None, by="category", categories=None):
+        """Estimate revenue at risk for the whole inventory in one NumPy pass.
+
+        Always refreshes ``simulation_results`` with the baseline. When
+        ``scenarios`` is given, also returns a (scenarios x components) matrix:
+        with ``by="category"`` each scenario is a {category: multiplier} dict or
+        a row of multipliers ordered like ``categories`` (default: sorted
+        category names); with ``by="component"`` each row has one multiplier
+        per component.
+        """
+        df = self._store.to_frame(copy=False)
+        base = simulation.revenue_at_risk(df["Revenue Impact %"].to_numpy(), df["Risk Score"].to_numpy())
+        self.simulation_results = pd.DataFrame({
+            "Component": df["Name"],
+            "Revenue at Risk (%)": base
+        })
+        if scenarios is None:
+            return None
+
+        if by == "component":
+            return simulation.scenario_matrix(base, scenarios)
+
+        codes, labels = simulation.category_codes(df["Category"])
+        if categories is not None:
+            # Re-index the codes onto the caller's column order
+            position = {cat: i for i, cat in enumerate(categories)}
+            remap = np.array([position.get(label, len(categories)) for label in labels], dtype=np.intp)
+            codes, labels = remap[codes], list(categories)
+        if len(scenarios) and isinstance(scenarios[0], dict):
+            scenarios = simulation.multipliers_from_dicts(scenarios, labels)
+        scenarios = np.atleast_2d(np.asarray(scenarios, dtype="float64"))
+        if categories is not None:
+            # Components whose category isn't listed keep a multiplier of 1
+            scenarios = np.hstack([scenarios, np.ones((len(scenarios), 1))])
+        return simulation.scenario_matrix(base, scenarios, codes)
+
+    def run_monte_carlo(self, revenue, n_trials=100_000, seed=42, max_workers=1):
+        """Monte Carlo revenue at risk: each component fails with probability
+        Risk Score / 100 and then loses Revenue Impact % of ``revenue``.
+
+        Returns P50/P90/P99 and mean loss per category plus a Total row.
+        With ``max_workers > 1`` trial blocks are spread over a process pool.
+        """
+        df = self._store.to_frame(copy=False)
+        loss = revenue * np.nan_to_num(df["Revenue Impact %"].to_numpy()) / 100
+        fail_prob = np.clip(np.nan_to_num(df["Risk Score"].to_numpy()) / 100, 0, 1)
+        codes, labels = simulation.category_codes(df["Category"])
+        if max_workers > 1:
+            return sweep.sweep_monte_carlo(loss, fail_prob, codes, labels, n_trials, seed, max_workers)
+        return simulation.monte_carlo_revenue_at_risk(loss, fail_prob, codes, labels, n_trials, seed)
 
     def generate_forecast(self):
         self.forecast_model = {"2024": 0.25, "2025": 0.28, "2026": 0.31}
 
     def summarize_financials(self):
-        total_spend = sum(c["Spend"] for c in self.components)
-        avg_revenue = sum(c["Revenue Impact %"] for c in self.components) / len(self.components)
-        avg_risk = sum(c["Risk Score"] for c in self.components) / len(self.components)
+        # Running totals from the store, so this is O(categories) not O(components)
+        totals = self._store.aggregates.totals()
+        count = totals["count"]
         self.financial_summary = {
-            "Total Spend": total_spend,
-            "Avg Revenue Support": avg_revenue,
-            "Avg Risk": avg_risk
+            "Total Spend": totals["spend"],
+            "Avg Revenue Support": totals["impact_sum"] / count if count else 0,
+            "Avg Risk": totals["risk_sum"] / count if count else 0
         }
 
     def get_category_aggregates(self):
-        aggregates = {}
-        for comp in self.components:
-            category = comp.get("Category")
-            spend = comp.get("Spend", 0)
-            revenue_impact = comp.get("Revenue Impact %", 0)
-
-            if category not in aggregates:
-                aggregates[category] = {"spend": 0, "revenue_impact": 0}
-
-            aggregates[category]["spend"] += spend
-            aggregates[category]["revenue_impact"] += revenue_impact
+        return {
+            category: {"spend": bucket["spend"], "revenue_impact": bucket["impact_sum"]}
+            for category, bucket in self._store.aggregates.by_category.items()
+        }
 
-        return aggregates
+    def get_expense_by_category(self):
+        return {
+            "Unknown" if category is None else category: bucket["spend"]
+            for category, bucket in self._store.aggregates.by_category.items()
+        }
 
     def get_ai_context(self):
         return {
@@ -69,45 +147,40 @@ class ITRMController:
         }
 
     def get_category_risk_summary(self):
-        category_risk = {}
-        for comp in self.components:
-            cat = comp.get("Category", "Unknown")
-            risk_score = comp.get("Risk Score", 0)
-            revenue_pct = comp.get("Revenue Impact %", 0)
-            risk_val = (revenue_pct * risk_score) / 100
-    
-            if cat not in category_risk:
-                category_risk[cat] = {"total_risk": 0, "components": []}
-    
-            category_risk[cat]["total_risk"] += risk_val
-            category_risk[cat]["components"].append({
-                "Name": comp.get("Name", ""),
-                "Revenue Impact %": revenue_pct,
-                "Risk Score": risk_score,
-                "Revenue at Risk (%)": round(risk_val, 2)
-            })
+        category_risk = {
+            "Unknown" if cat is None else cat: {"total_risk": bucket["risk_weighted"], "components": []}
+            for cat, bucket in self._store.aggregates.by_category.items()
+        }
+
+        # Per-component breakdown is inherently O(n); build it column-wise
+        df = self._store.to_frame(copy=False)
+        revenue_pct = df["Revenue Impact %"].fillna(0)
+        risk_score = df["Risk Score"].fillna(0)
+        details = pd.DataFrame({
+            "Name": df["Name"].fillna(""),
+            "Revenue Impact %": revenue_pct,
+            "Risk Score": risk_score,
+            "Revenue at Risk (%)": (revenue_pct * risk_score / 100).round(2),
+        })
+        for cat, rows in details.groupby(df["Category"].fillna("Unknown"), sort=False):
+            category_risk[cat]["components"] = rows.to_dict(orient="records")
     
         return category_risk
 
     def get_baseline_revenue(self):
         return getattr(self, "baseline_revenue", st.session_state.get("revenue", 0))
-    
-    def get_category_impact_percentages(self):
-        """Returns a dictionary mapping category -> assigned revenue impact %"""
-        category_map = {}
-        for comp in self.components:
-            cat = comp.get("Category")
-            impact = comp.get("Revenue Impact %")
-            if cat and isinstance(impact, (int, float)):
-                if cat in category_map:
-                    category_map[cat].append(impact)
-                else:
-                    category_map[cat] = [impact]
-    
-        # Average across components for each category
-        return {cat: sum(vals)/len(vals) for cat, vals in category_map.items()}
-
 
+    def get_revenue(self):
+        return self.get_baseline_revenue()
 
+    def set_revenue(self, revenue):
+        self.baseline_revenue = revenue
     
-
+    def get_category_impact_percentages(self):
+        """Returns a dictionary mapping category -> assigned revenue impact %"""
+        # Average across components for each category, from the running sums
+        return {
+            cat: bucket["impact_sum"] / bucket["impact_count"]
+            for cat, bucket in self._store.aggregates.by_category.items()
+            if cat and bucket["impact_count"]
+        }
@@ -0,0 +1,119 @@
+# controller/persistence.py
+import itertools
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+
+class WriteBehindQueue:
+    """Background writer for project saves.
+
+    ``submit`` returns immediately; a daemon thread calls ``write_fn(project_id,
+    payload)``. Saves for a project that is already waiting are merged into the
+    pending payload (later fields win), so a burst of edits costs one write.
+    Failed writes are retried with exponential backoff.
+
+    The worker never touches Streamlit session state (it belongs to the script
+    thread). Progress is published through ``status(project_id)``: a snapshot
+    with ``state`` ("queued", "saving", "retrying", "saved" or "failed"),
+    ``attempts``, ``error``, ``row`` (the saved row once "saved"), ``seq``
+    (bumped on every change) and ``updated``. Pages poll it on each rerun and
+    apply finished saves themselves. Finished entries expire after
+    ``status_ttl`` seconds, and at most ``max_status`` are kept.
+    """
+
+    def __init__(self, write_fn, maxsize=64, max_retries=4, base_delay=0.5, max_delay=8.0,
+                 max_status=256, status_ttl=3600):
+        self.write_fn = write_fn
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_status = max_status
+        self.status_ttl = status_ttl
+        self._status = OrderedDict()
+        self._status_lock = threading.Lock()
+        self._seq = itertools.count(1)
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="supabase-write-behind", daemon=True)
+        self._thread.start()
+
+    def _set_status(self, project_id, state, attempts=0, error=None, row=None):
+        with self._status_lock:
+            self._status[project_id] = {
+                "state": state,
+                "attempts": attempts,
+                "error": error,
+                "row": row,
+                "seq": next(self._seq),
+                "updated": datetime.utcnow().isoformat(),
+                "at": time.monotonic(),
+            }
+            self._status.move_to_end(project_id)
+            self._prune_status(keep=project_id)
+
+    def _prune_status(self, keep):
+        # Oldest first; entries still in flight and the one just set are kept
+        now = time.monotonic()
+        for project_id, entry in list(self._status.items()):
+            if project_id == keep or entry["state"] not in ("saved", "failed"):
+                continue
+            if len(self._status) > self.max_status or now - entry["at"] > self.status_ttl:
+                del self._status[project_id]
+
+    def status(self, project_id):
+        """Copy of the latest status for ``project_id``, or None."""
+        with self._status_lock:
+            entry = self._status.get(project_id)
+            return dict(entry) if entry else None
+
+    def submit(self, project_id, payload):
+        """Queue ``payload`` for ``project_id``; False if the queue is full."""
+        with self._lock:
+            if project_id in self._pending:
+                self._pending[project_id].update(payload)
+                return True
+            try:
+                self._queue.put_nowait(project_id)
+            except queue.Full:
+                return False
+            self._pending[project_id] = dict(payload)
+            self._set_status(project_id, "queued")
+        return True
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _run(self):
+        while True:
+            project_id = self._queue.get()
+            with self._lock:
+                payload = self._pending.pop(project_id)
+            self._write(project_id, payload)
+            self._queue.task_done()
+
+    def _write(self, project_id, payload):
+        for attempt in range(1, self.max_retries + 2):
+            self._set_status(project_id, "saving", attempt)
+            try:
+                result = self.write_fn(project_id, payload)
+            except Exception as e:
+                result, error = None, str(e)
+            else:
+                error = None if result is not None else "No row returned"
+            if error is None:
+                self._set_status(project_id, "saved", attempt, row=result)
+                return
+            if attempt > self.max_retries:
+                break
+            self._set_status(project_id, "retrying", attempt, error)
+            time.sleep(min(self.base_delay * 2 ** (attempt - 1), self.max_delay))
+        self._set_status(project_id, "failed", attempt, error)
+
+    def join(self):
+        """Block until everything queued so far has been written or has failed."""
+        self._queue.join()
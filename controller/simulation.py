@@ -0,0 +1,165 @@
+# controller/simulation.py
+import numpy as np
+import pandas as pd
+
+
+def revenue_at_risk(impact, risk):
+    """Revenue at risk (%) per component: Revenue Impact % x Risk Score / 100.
+
+    Missing impact or risk values count as 0.
+    """
+    return np.nan_to_num(np.asarray(impact, dtype="float64")) * np.nan_to_num(np.asarray(risk, dtype="float64")) / 100
+
+
+def category_codes(categories):
+    """Integer code per component plus the category labels the codes index into."""
+    codes, labels = pd.factorize(pd.Series(categories, dtype=object).fillna("Unknown"), sort=True)
+    return codes, list(labels)
+
+
+def scenario_matrix(base, multipliers, codes=None, dtype="float64"):
+    """Apply a batch of risk multipliers to the baseline revenue-at-risk vector.
+
+    ``multipliers`` is (scenarios x categories) when ``codes`` maps each
+    component to a category column, or (scenarios x components) otherwise.
+    Returns a (scenarios x components) matrix in one broadcast; pass
+    ``dtype="float32"`` to halve its memory for very large sweeps.
+    """
+    multipliers = np.atleast_2d(np.asarray(multipliers, dtype=dtype))
+    if codes is not None:
+        multipliers = multipliers[:, codes]
+    elif multipliers.shape[1] != len(base):
+        raise ValueError(f"Expected {len(base)} per-component multipliers, got {multipliers.shape[1]}")
+    return multipliers * np.asarray(base, dtype=dtype)
+
+
+def multipliers_from_dicts(scenarios, labels, default=1.0):
+    """Turn [{category: multiplier}, ...] into a (scenarios x categories) array."""
+    columns = {label: i for i, label in enumerate(labels)}
+    matrix = np.full((len(scenarios), len(labels)), default, dtype="float64")
+    for row, scenario in enumerate(scenarios):
+        for category, multiplier in scenario.items():
+            if category in columns:
+                matrix[row, columns[category]] = multiplier
+    return matrix
+
+
+# --- Monte Carlo revenue at risk ---
+MC_QUANTILES = (0.50, 0.90, 0.99)
+MC_BLOCK_ELEMENTS = 2_000_000  # trials x components drawn per block (~16 MB)
+MC_BINS = 4096
+# Blocks are reduced in fixed shards of this many, in order, whether they run
+# in this process or on a pool (controller.sweep), so the floating-point sums
+# and therefore the results are identical for any worker count
+MC_BLOCKS_PER_SHARD = 4
+
+
+class StreamingQuantiles:
+    """Fixed-bin histograms per column, so percentiles of an unbounded stream
+    of trials are estimated in O(columns x bins) memory.
+
+    Each column's range is [0, upper]; losses can't exceed the all-fail total,
+    so nothing falls outside it. Estimates are within upper / bins.
+    """
+
+    def __init__(self, upper, bins=MC_BINS):
+        self.upper = np.where(np.asarray(upper, dtype="float64") > 0, upper, 1.0)
+        self.bins = bins
+        self.counts = np.zeros((len(self.upper), bins), dtype=np.int64)
+        self.sums = np.zeros(len(self.upper), dtype="float64")
+        self.total = 0
+
+    def update(self, samples):
+        """Fold in a (trials x columns) block of samples."""
+        n_cols = len(self.upper)
+        idx = np.clip((samples / self.upper * self.bins).astype(np.int64), 0, self.bins - 1)
+        idx += np.arange(n_cols) * self.bins
+        self.counts += np.bincount(idx.ravel(), minlength=n_cols * self.bins).reshape(n_cols, self.bins)
+        self.sums += samples.sum(axis=0)
+        self.total += len(samples)
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.sums += other.sums
+        self.total += other.total
+
+    def quantiles(self, qs=MC_QUANTILES):
+        """(len(qs) x columns) estimates, interpolated linearly inside a bin."""
+        width = self.upper / self.bins
+        cum = np.cumsum(self.counts, axis=1)
+        out = np.zeros((len(qs), len(self.upper)))
+        for row, q in enumerate(qs):
+            target = q * self.total
+            bin_idx = np.argmax(cum >= target, axis=1)
+            cols = np.arange(len(self.upper))
+            in_bin = self.counts[cols, bin_idx]
+            before = cum[cols, bin_idx] - in_bin
+            frac = np.divide(target - before, in_bin, out=np.zeros(len(cols)), where=in_bin > 0)
+            out[row] = (bin_idx + frac) * width
+        return out
+
+    def mean(self):
+        return self.sums / max(self.total, 1)
+
+
+def mc_block_trials(n_components, max_elements=MC_BLOCK_ELEMENTS):
+    """Trials per block for an inventory size; depends only on the inventory."""
+    return int(max(1, min(10_000, max_elements // max(n_components, 1))))
+
+
+def mc_shards(n_blocks, blocks_per_shard=MC_BLOCKS_PER_SHARD):
+    """Block ids grouped into the fixed shards every Monte Carlo run reduces through."""
+    return [list(range(b, min(b + blocks_per_shard, n_blocks))) for b in range(0, n_blocks, blocks_per_shard)]
+
+
+def mc_loss_weights(loss, codes, n_categories):
+    """(components x categories+1) weights: each loss in its category column and in Total."""
+    weights = np.zeros((len(loss), n_categories + 1))
+    weights[np.arange(len(loss)), codes] = loss
+    weights[:, n_categories] = loss
+    return weights
+
+
+def mc_run_blocks(fail_prob, weights, block_ids, block_trials, n_trials, seed, bins=MC_BINS):
+    """Simulate the given blocks and return their StreamingQuantiles.
+
+    Block ``b`` always draws from the ``b``-th child of ``SeedSequence(seed)``
+    and covers trials [b * block_trials, (b + 1) * block_trials), so results
+    don't depend on how blocks are chunked or distributed.
+    """
+    children = np.random.SeedSequence(seed).spawn(int(np.ceil(n_trials / block_trials)))
+    acc = StreamingQuantiles(weights.sum(axis=0), bins)
+    for b in block_ids:
+        size = min(block_trials, n_trials - b * block_trials)
+        rng = np.random.default_rng(children[b])
+        failed = rng.random((size, len(fail_prob)), dtype=np.float32) < fail_prob
+        acc.update(failed @ weights)
+    return acc
+
+
+def monte_carlo_revenue_at_risk(loss, fail_prob, codes, labels, n_trials=100_000, seed=42, bins=MC_BINS):
+    """P50/P90/P99 and mean revenue at risk per category over ``n_trials`` trials.
+
+    ``loss`` is each component's revenue loss if it fails and ``fail_prob``
+    its failure probability. Trials run in blocks sized to keep memory
+    bounded and are folded into streaming histograms rather than kept.
+    """
+    weights = mc_loss_weights(np.asarray(loss, dtype="float64"), codes, len(labels))
+    fail_prob = np.asarray(fail_prob, dtype=np.float32)
+    block_trials = mc_block_trials(len(fail_prob))
+    n_blocks = int(np.ceil(n_trials / block_trials))
+    acc = StreamingQuantiles(weights.sum(axis=0), bins)
+    for shard in mc_shards(n_blocks):
+        acc.merge(mc_run_blocks(fail_prob, weights, shard, block_trials, n_trials, seed, bins))
+    return mc_summary(acc, labels)
+
+
+def mc_summary(acc, labels):
+    pct = acc.quantiles(MC_QUANTILES)
+    return pd.DataFrame({
+        "Category": list(labels) + ["Total"],
+        "Mean ($)": acc.mean(),
+        "P50 ($)": pct[0],
+        "P90 ($)": pct[1],
+        "P99 ($)": pct[2],
+    })
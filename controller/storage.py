@@ -0,0 +1,326 @@
+# controller/storage.py
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+import streamlit as st
+
+# Columns of the projects table. JSON columns hold dicts/lists and are
+# (de)serialised by backends that don't have a native JSON type.
+PROJECT_COLUMNS = (
+    "id", "user_email", "project_name", "revenue", "expenses", "architecture",
+    "maturity_score", "maturity_answers", "cyber_answers", "last_saved", "created_at",
+)
+JSON_COLUMNS = {"expenses", "architecture", "maturity_answers", "cyber_answers"}
+
+# Lightweight columns for project pickers; the JSON blobs stay server-side
+SUMMARY_COLUMNS = ("id", "project_name", "last_saved")
+
+DEFAULT_SQLITE_PATH = os.path.join("data", "itrm_projects.db")
+
+
+class StorageError(Exception):
+    """A backend call failed (network, constraint or database error)."""
+
+
+class ProjectStore(ABC):
+    """Interface every project storage backend implements.
+
+    Rows are plain dicts keyed by PROJECT_COLUMNS.
+    """
+
+    @abstractmethod
+    def save_project(self, project_data):
+        """Insert a project; returns the stored row."""
+
+    @abstractmethod
+    def get_projects_by_email(self, email):
+        """All project rows owned by ``email``."""
+
+    @abstractmethod
+    def list_projects_by_email(self, email, limit, offset=0):
+        """SUMMARY_COLUMNS of ``email``'s projects, most recently saved first."""
+
+    @abstractmethod
+    def get_project_by_id(self, project_id):
+        """One full project row, or None."""
+
+    @abstractmethod
+    def update_project_by_id(self, project_id, updated_data):
+        """Apply ``updated_data`` to one project; returns the updated row or None."""
+
+    @abstractmethod
+    def delete_project_by_id(self, project_id):
+        """Delete one project; returns True if a row was removed."""
+
+
+# --- Supabase ---
+class SupabaseStore(ProjectStore):
+    def __init__(self, client_factory):
+        # The client is only created on first use, so importing this module
+        # (or running on another backend) never needs Supabase credentials
+        self._client_factory = client_factory
+
+    def _table(self):
+        return self._client_factory().table("projects")
+
+    def _execute(self, query):
+        from postgrest.exceptions import APIError
+        try:
+            return query.execute()
+        except APIError as e:
+            raise StorageError(str(e)) from e
+
+    def save_project(self, project_data):
+        return self._execute(self._table().insert(project_data)).data[0]
+
+    def get_projects_by_email(self, email):
+        return self._execute(self._table().select("*").eq("user_email", email)).data
+
+    def list_projects_by_email(self, email, limit, offset=0):
+        query = (
+            self._table().select(",".join(SUMMARY_COLUMNS)).eq("user_email", email)
+            .order("last_saved", desc=True).range(offset, offset + limit - 1)
+        )
+        return self._execute(query).data
+
+    def get_project_by_id(self, project_id):
+        data = self._execute(self._table().select("*").eq("id", project_id).limit(1)).data
+        return data[0] if data else None
+
+    def update_project_by_id(self, project_id, updated_data):
+        data = self._execute(self._table().update(updated_data).eq("id", project_id)).data
+        return data[0] if data else None
+
+    def delete_project_by_id(self, project_id):
+        return bool(self._execute(self._table().delete().eq("id", project_id)).data)
+
+
+# --- SQLite ---
+class SQLiteStore(ProjectStore):
+    """Local single-file backend; ``:memory:`` works for tests and benchmarks.
+
+    One connection is shared across threads (the write-behind worker writes
+    from its own thread) and serialised with a lock.
+    """
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH):
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS projects ("
+                "id TEXT PRIMARY KEY, user_email TEXT, project_name TEXT, revenue REAL, "
+                "expenses TEXT, architecture TEXT, maturity_score REAL, maturity_answers TEXT, "
+                "cyber_answers TEXT, last_saved TEXT, created_at TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_projects_user_email ON projects (user_email)")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_projects_user_email_saved ON projects (user_email, last_saved)"
+            )
+
+    def _encode(self, data):
+        unknown = set(data) - set(PROJECT_COLUMNS)
+        if unknown:
+            raise StorageError(f"Unknown project columns: {', '.join(sorted(unknown))}")
+        return {
+            key: json.dumps(value, default=str) if key in JSON_COLUMNS and value is not None else value
+            for key, value in data.items()
+        }
+
+    def _decode(self, row):
+        return {
+            key: json.loads(row[key]) if key in JSON_COLUMNS and row[key] is not None else row[key]
+            for key in row.keys()
+        }
+
+    def _run(self, sql, params=()):
+        try:
+            with self._lock, self._conn:
+                return self._conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            raise StorageError(str(e)) from e
+
+    def _get(self, project_id):
+        rows = self._run("SELECT * FROM projects WHERE id = ?", (project_id,))
+        return self._decode(rows[0]) if rows else None
+
+    def save_project(self, project_data):
+        data = self._encode({
+            "id": str(uuid.uuid4()),
+            "created_at": datetime.utcnow().isoformat(),
+            **project_data,
+        })
+        columns = ", ".join(data)
+        self._run(f"INSERT INTO projects ({columns}) VALUES ({', '.join('?' * len(data))})", tuple(data.values()))
+        return self._get(data["id"])
+
+    def get_projects_by_email(self, email):
+        rows = self._run("SELECT * FROM projects WHERE user_email = ? ORDER BY created_at", (email,))
+        return [self._decode(row) for row in rows]
+
+    def list_projects_by_email(self, email, limit, offset=0):
+        rows = self._run(
+            f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM projects WHERE user_email = ? "
+            "ORDER BY last_saved DESC NULLS LAST, created_at DESC LIMIT ? OFFSET ?",
+            (email, limit, offset),
+        )
+        return [dict(row) for row in rows]
+
+    def get_project_by_id(self, project_id):
+        return self._get(project_id)
+
+    def update_project_by_id(self, project_id, updated_data):
+        data = self._encode({key: value for key, value in updated_data.items() if key != "id"})
+        if data:
+            assignments = ", ".join(f"{key} = ?" for key in data)
+            self._run(f"UPDATE projects SET {assignments} WHERE id = ?", (*data.values(), project_id))
+        return self._get(project_id)
+
+    def delete_project_by_id(self, project_id):
+        if self._get(project_id) is None:
+            return False
+        self._run("DELETE FROM projects WHERE id = ?", (project_id,))
+        return True
+
+
+# --- Read-through cache ---
+DEFAULT_CACHE_TTL = 60.0
+
+
+class CachedProjectStore(ProjectStore):
+    """Read-through TTL cache in front of another backend.
+
+    Reads are cached by email (full and paged listings) and by project id;
+    saves, updates and deletes drop the entries they could have made stale.
+    Callers get copies, so edits to a loaded project never leak into the cache.
+    """
+
+    def __init__(self, store, ttl=DEFAULT_CACHE_TTL):
+        self.store = store
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = self.misses = 0
+
+    def _read(self, key, load):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            self.misses += 1
+            generation = self._generation
+        value = load()
+        with self._lock:
+            # Don't cache a read that raced with a write
+            if generation == self._generation:
+                self._entries[key] = (now + self.ttl, value)
+        return copy.deepcopy(value)
+
+    def invalidate(self, email=None, project_id=None):
+        """Drop cached listings for ``email`` and the row for ``project_id``.
+
+        With neither given, everything is dropped.
+        """
+        with self._lock:
+            self._generation += 1
+            if email is None and project_id is None:
+                self._entries.clear()
+                return
+            for key in list(self._entries):
+                if (key[0] == "project" and key[1] == project_id) or (key[0] != "project" and key[1] == email):
+                    del self._entries[key]
+
+    def _owner(self, project_id):
+        with self._lock:
+            entry = self._entries.get(("project", project_id))
+        return entry[1].get("user_email") if entry and entry[1] else None
+
+    def save_project(self, project_data):
+        row = self.store.save_project(project_data)
+        self.invalidate(email=(row or project_data).get("user_email"))
+        return row
+
+    def get_projects_by_email(self, email):
+        return self._read(("all", email), lambda: self.store.get_projects_by_email(email))
+
+    def list_projects_by_email(self, email, limit, offset=0):
+        return self._read(("list", email, limit, offset), lambda: self.store.list_projects_by_email(email, limit, offset))
+
+    def get_project_by_id(self, project_id):
+        return self._read(("project", project_id), lambda: self.store.get_project_by_id(project_id))
+
+    def update_project_by_id(self, project_id, updated_data):
+        owner = self._owner(project_id)
+        row = self.store.update_project_by_id(project_id, updated_data)
+        emails = {owner, (row or {}).get("user_email"), updated_data.get("user_email")} - {None}
+        if not emails:
+            # Unknown owner: any listing could show this project
+            self.invalidate()
+        for email in emails:
+            self.invalidate(email=email, project_id=project_id)
+        return row
+
+    def delete_project_by_id(self, project_id):
+        owner = self._owner(project_id)
+        deleted = self.store.delete_project_by_id(project_id)
+        if owner is None:
+            self.invalidate()
+        else:
+            self.invalidate(email=owner, project_id=project_id)
+        return deleted
+
+
+# --- Backend selection ---
+def _configured_backend():
+    backend = os.environ.get("ITRM_STORAGE")
+    if backend:
+        return backend.lower()
+    try:
+        if "storage" in st.secrets:
+            return st.secrets["storage"].get("backend", "supabase").lower()
+        if "supabase" in st.secrets:
+            return "supabase"
+    except FileNotFoundError:
+        pass
+    return "sqlite"
+
+
+@st.cache_resource
+def get_storage():
+    """The project backend for this process: ``ITRM_STORAGE`` env var, then
+    ``[storage] backend`` in secrets, then Supabase if it is configured,
+    otherwise a local SQLite file (``ITRM_SQLITE_PATH``). Reads go through a
+    CachedProjectStore unless ``ITRM_PROJECT_CACHE_TTL`` is 0.
+    """
+    backend = _configured_backend()
+    if backend == "supabase":
+        from utils.supabase_client import get_supabase
+        store = SupabaseStore(get_supabase)
+    elif backend == "sqlite":
+        path = os.environ.get("ITRM_SQLITE_PATH")
+        if path is None:
+            try:
+                path = st.secrets.get("storage", {}).get("sqlite_path", DEFAULT_SQLITE_PATH)
+            except FileNotFoundError:
+                path = DEFAULT_SQLITE_PATH
+        store = SQLiteStore(path)
+    else:
+        raise ValueError(f"Unknown storage backend '{backend}' (expected 'supabase' or 'sqlite')")
+
+    ttl = float(os.environ.get("ITRM_PROJECT_CACHE_TTL", DEFAULT_CACHE_TTL))
+    return CachedProjectStore(store, ttl) if ttl > 0 else store
@@ -1,79 +1,230 @@
 # controller/supabase_controller.py
 import streamlit as st
-from utils.supabase_client import supabase
-from postgrest.exceptions import APIError
 from datetime import datetime
+from controller.persistence import WriteBehindQueue
+from controller.storage import StorageError, get_storage
+import base64
+import gzip
+import hashlib
+import json
+
+# JSON columns larger than this are sent gzipped (base64 inside a small
+# wrapper object, since the columns are jsonb)
+COMPRESS_MIN_BYTES = 32 * 1024
+_GZIP_KEY = "__gzip_b64__"
+
+# Project column -> session_state key it is saved from
+SESSION_FIELDS = {
+    "revenue": "revenue",
+    "expenses": "expenses",
+    "architecture": "architecture",
+    "maturity_score": "maturity_score",
+    "maturity_answers": "it_maturity_answers",
+    "cyber_answers": "cybersecurity_answers",
+}
+
+def _dumps(value):
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+def _digest(value):
+    return hashlib.sha256(_dumps(value).encode()).hexdigest()
+
+def encode_project_fields(data):
+    """Compress large dict/list values for transport; small ones pass through."""
+    encoded = {}
+    for key, value in data.items():
+        if isinstance(value, (dict, list)):
+            raw = _dumps(value).encode()
+            if len(raw) >= COMPRESS_MIN_BYTES:
+                value = {_GZIP_KEY: base64.b64encode(gzip.compress(raw)).decode("ascii")}
+        encoded[key] = value
+    return encoded
+
+def decode_project(project):
+    """Expand any compressed fields of a project row back to plain JSON values."""
+    if not project:
+        return project
+    decoded = dict(project)
+    for key, value in project.items():
+        if isinstance(value, dict) and set(value) == {_GZIP_KEY}:
+            decoded[key] = json.loads(gzip.decompress(base64.b64decode(value[_GZIP_KEY])))
+    return decoded
 
 def save_project(project_data):
-    """Insert a new project into Supabase"""
+    """Insert a new project into the configured storage backend"""
     try:
-        response = supabase.table("projects").insert(project_data).execute()
-        return response.data[0]
-    except APIError as e:
+        return decode_project(get_storage().save_project(encode_project_fields(project_data)))
+    except StorageError as e:
         print("Save failed:", e)
         return None
 
 def get_projects_by_email(email):
     """Fetch all projects associated with a given user email"""
     try:
-        response = supabase.table("projects").select("*").eq("user_email", email).execute()
-        return response.data
-    except APIError as e:
+        return [decode_project(project) for project in get_storage().get_projects_by_email(email)]
+    except StorageError as e:
         print("Fetch failed:", e)
         return []
 
+PROJECT_PAGE_SIZE = 25
+
+def list_projects_by_email(email, page=0, page_size=PROJECT_PAGE_SIZE):
+    """One page of project summaries (id, project_name, last_saved), newest first.
+
+    Returns (rows, has_more).
+    """
+    try:
+        # One extra row tells us whether another page exists without a count query
+        rows = get_storage().list_projects_by_email(email, page_size + 1, page * page_size)
+        return rows[:page_size], len(rows) > page_size
+    except StorageError as e:
+        print("List failed:", e)
+        return [], False
+
+def get_project_by_id(project_id):
+    """Fetch one full project row"""
+    try:
+        return decode_project(get_storage().get_project_by_id(project_id))
+    except StorageError as e:
+        print("Fetch failed:", e)
+        return None
+
 def update_project_by_id(project_id, updated_data):
     """Update a project by its UUID"""
     try:
-        response = supabase.table("projects").update(updated_data).eq("id", project_id).execute()
-        return response.data[0] if response.data else None
-    except APIError as e:
+        return decode_project(get_storage().update_project_by_id(project_id, encode_project_fields(updated_data)))
+    except StorageError as e:
         print("Update failed:", e)
         return None
 
-def save_session_to_supabase():
+def _write_project(project_id, updated_data):
+    return decode_project(get_storage().update_project_by_id(project_id, encode_project_fields(updated_data)))
+
+@st.cache_resource
+def get_write_behind_queue():
+    """Process-wide background writer shared by every session."""
+    return WriteBehindQueue(_write_project)
+
+def _apply_background_save(project_id):
+    """Fold the latest background save for ``project_id`` into this session.
+
+    Runs on the script thread; the worker only publishes status. A finished
+    save updates project_data once; a failed one drops the saved digests so
+    they are re-seeded from the last saved row and the changes queue again.
+    """
+    status = get_write_behind_queue().status(project_id)
+    seen = st.session_state.setdefault("_persistence_seen", {})
+    if not status or seen.get(project_id) == status["seq"]:
+        return status
+    if status["state"] == "saved":
+        seen[project_id] = status["seq"]
+        st.session_state["project_data"].update(status["row"])
+    elif status["state"] == "failed":
+        seen[project_id] = status["seq"]
+        st.session_state.get("_saved_digests", {}).pop(project_id, None)
+    return status
+
+def save_session_to_supabase(background=None, quiet=False):
+    """Save the project fields that changed since the last save.
+
+    With ``background`` (default: the autosave toggle) the write is handed to
+    the write-behind queue and the call returns at once; ``quiet`` suppresses
+    the "nothing to save" messages for autosave reruns.
+    """
     if "project_data" not in st.session_state:
-        st.warning("⚠️ No project loaded — nothing to save.")
+        if not quiet:
+            st.warning("⚠️ No project loaded — nothing to save.")
         return None
 
     if "id" not in st.session_state["project_data"]:
-        st.error("❌ Project ID missing from project data. Please recreate or reload your project session.")
+        if not quiet:
+            st.error("❌ Project ID missing from project data. Please recreate or reload your project session.")
         return None
 
-    project_id = st.session_state["project_data"]["id"]
-
-    updated_data = {
-        "user_email": (
-            st.session_state["project_data"].get("user_email")
-            or st.session_state.get("user_email")
-        ),
-        "revenue": st.session_state.get("revenue"),
-        "expenses": st.session_state.get("expenses"),
-        "architecture": st.session_state.get("architecture"),
-        "maturity_score": st.session_state.get("maturity_score"),
-        "last_saved": datetime.utcnow().isoformat(),
-        "maturity_answers": st.session_state.get("it_maturity_answers"),
-        "cyber_answers": st.session_state.get("cybersecurity_answers"),
+    project_data = st.session_state["project_data"]
+    project_id = project_data["id"]
+    _apply_background_save(project_id)
+
+    current = {
+        "user_email": project_data.get("user_email") or st.session_state.get("user_email"),
+        **{column: st.session_state.get(key) for column, key in SESSION_FIELDS.items()},
+    }
+    digests = {column: _digest(value) for column, value in current.items()}
+
+    # Digests of what the database holds; seeded from the loaded row the first time
+    saved_digests = st.session_state.setdefault("_saved_digests", {})
+    if project_id not in saved_digests:
+        saved_digests[project_id] = {column: _digest(project_data.get(column)) for column in current}
+    changed = {
+        column: value for column, value in current.items()
+        if digests[column] != saved_digests[project_id].get(column)
     }
 
+    if not changed:
+        if not quiet:
+            st.info("No changes since the last save.")
+        return project_data
+
+    updated_data = {**changed, "last_saved": datetime.utcnow().isoformat()}
+
+    def mark_saved(row):
+        project_data.update({**changed, **row})
+
+    if background is None:
+        background = st.session_state.get("autosave", False)
+    if background:
+        # Count the fields as saved now so later reruns don't queue them again;
+        # on failure the digests are re-seeded from the last saved row (see
+        # _apply_background_save)
+        saved_digests[project_id].update({column: digests[column] for column in changed})
+        if get_write_behind_queue().submit(project_id, updated_data):
+            if not quiet:
+                st.info(f"💾 Save queued ({', '.join(changed)}); it will finish in the background.")
+            return project_data
+        # Queue full: fall back to a blocking save
+
     try:
-        result = supabase.table("projects").update(updated_data).eq("id", project_id).execute()
-
-        if result.data:
-            st.session_state["project_data"] = result.data[0]
-            st.success(f"✅ Project saved at {result.data[0]['last_saved']}")
-        return result.data[0] if result.data else None
-    except APIError as e:
-        st.error("❌ Failed to save project to Supabase.")
+        row = _write_project(project_id, updated_data)
+    except StorageError as e:
+        # Re-seed from the last saved row next time
+        saved_digests.pop(project_id, None)
+        st.error("❌ Failed to save project.")
         st.write(e)
         return None
 
+    if not row:
+        saved_digests.pop(project_id, None)
+        return None
+    mark_saved(row)
+    # Every column now matches the database: the changed ones were just
+    # written and the rest already did, so the next diff starts from here
+    saved_digests[project_id] = dict(digests)
+    st.success(f"✅ Project saved at {row['last_saved']} ({', '.join(changed)})")
+    return project_data
+
+def autosave_controls():
+    """Sidebar autosave toggle plus the background save status for the loaded project."""
+    st.sidebar.toggle("🔄 Autosave", key="autosave", help="Save changes in the background as you work.")
+    if st.session_state.get("autosave"):
+        save_session_to_supabase(background=True, quiet=True)
+
+    project_id = st.session_state.get("project_data", {}).get("id")
+    status = _apply_background_save(project_id) if project_id else None
+    if status:
+        label = {
+            "queued": "⏳ Save queued",
+            "saving": "💾 Saving...",
+            "retrying": f"🔁 Retrying save (attempt {status['attempts']})",
+            "saved": "✅ All changes saved",
+            "failed": f"❌ Save failed: {status['error']}",
+        }[status["state"]]
+        st.sidebar.caption(label)
+
 def delete_project_by_id(project_id):
-    """Deletes a project from Supabase by UUID"""
+    """Deletes a project by UUID; True if it existed"""
     try:
-        result = supabase.table("projects").delete().eq("id", project_id).execute()
-        return result
-    except APIError as e:
+        return get_storage().delete_project_by_id(project_id)
+    except StorageError as e:
         st.error("❌ Failed to delete project.")
         st.write(e)
         return None
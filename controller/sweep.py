@@ -0,0 +1,152 @@
+# controller/sweep.py
+import atexit
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from controller import simulation
+from utils.forecast_engine import growth_factors
+
+# Shard sizes are fixed (never derived from the worker count) and shards are
+# reduced in order, so a sweep returns identical numbers on 1 or 32 workers.
+SCENARIOS_PER_SHARD = 256
+
+_pools = {}
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def _get_pool(max_workers):
+    # "spawn" because forking the multi-threaded Streamlit server is unsafe
+    if max_workers not in _pools:
+        _pools[max_workers] = ProcessPoolExecutor(max_workers=max_workers, mp_context=mp.get_context("spawn"))
+    return _pools[max_workers]
+
+
+def _evict_pool(max_workers):
+    pool = _pools.pop(max_workers, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def _shutdown_pools():
+    for pool in _pools.values():
+        pool.shutdown(wait=False, cancel_futures=True)
+    _pools.clear()
+
+
+class SharedColumns:
+    """Copy named arrays into shared memory once; workers map them by name.
+
+    Use as a context manager so the segments are unlinked when the sweep ends.
+    """
+
+    def __init__(self, **arrays):
+        self._segments = []
+        self.spec = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=segment.buf)[...] = array
+            self._segments.append(segment)
+            self.spec[name] = (segment.name, array.shape, array.dtype.str)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
+        self._segments = []
+
+
+def _with_shared(spec, fn, *args):
+    """Attach to the shared columns in ``spec``, run ``fn(columns, *args)``, detach."""
+    segments = {name: shared_memory.SharedMemory(name=seg_name) for name, (seg_name, _, _) in spec.items()}
+    columns = {
+        name: np.ndarray(shape, np.dtype(dtype), buffer=segments[name].buf)
+        for name, (_, shape, dtype) in spec.items()
+    }
+    try:
+        return fn(columns, *args)
+    finally:
+        # Views must be released before the mappings can close
+        columns.clear()
+        for segment in segments.values():
+            segment.close()
+
+
+def _run_shards(kernel, shared, shards, max_workers):
+    if max_workers <= 1 or len(shards) <= 1:
+        return [_with_shared(shared.spec, kernel, shard) for shard in shards]
+    args = ([shared.spec] * len(shards), [kernel] * len(shards), shards)
+    try:
+        return list(_get_pool(max_workers).map(_with_shared, *args))
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); a broken pool rejects every
+        # later job, so replace it and retry once on a fresh one
+        _evict_pool(max_workers)
+        try:
+            return list(_get_pool(max_workers).map(_with_shared, *args))
+        except BrokenProcessPool:
+            _evict_pool(max_workers)
+            raise
+
+
+# --- Kernels (module-level so worker processes can unpickle them) ---
+def _monte_carlo_kernel(columns, job):
+    block_ids, block_trials, n_trials, seed = job
+    return simulation.mc_run_blocks(columns["fail_prob"], columns["weights"], block_ids, block_trials, n_trials, seed)
+
+
+def _forecast_kernel(columns, growth):
+    # growth is (scenarios x categories) annual rates; Year 1 is the baseline
+    # spend. Every (scenario, category) pair is one series for the forecast
+    # engine's growth factors, summed back over categories per scenario.
+    years = int(columns["years"][0])
+    rates = np.repeat(growth.reshape(-1, 1), years, axis=1)
+    factors = growth_factors(rates).reshape(growth.shape[0], growth.shape[1], years)
+    return np.einsum("scy,c->sy", factors, columns["base_spend"])
+
+
+# --- Public sweeps ---
+def sweep_monte_carlo(loss, fail_prob, codes, labels, n_trials=100_000, seed=42, max_workers=None):
+    """Parallel version of simulation.monte_carlo_revenue_at_risk.
+
+    Blocks are sharded across processes the same way the serial version
+    shards them (simulation.mc_shards) and merged in shard order, so output
+    is bitwise identical for any worker count.
+    """
+    weights = simulation.mc_loss_weights(np.asarray(loss, dtype="float64"), codes, len(labels))
+    fail_prob = np.asarray(fail_prob, dtype=np.float32)
+    block_trials = simulation.mc_block_trials(len(fail_prob))
+    n_blocks = int(np.ceil(n_trials / block_trials))
+    jobs = [(shard, block_trials, n_trials, seed) for shard in simulation.mc_shards(n_blocks)]
+    with SharedColumns(fail_prob=fail_prob, weights=weights) as shared:
+        partials = _run_shards(_monte_carlo_kernel, shared, jobs, max_workers or default_workers())
+    acc = simulation.StreamingQuantiles(weights.sum(axis=0))
+    for partial in partials:
+        acc.merge(partial)
+    return simulation.mc_summary(acc, labels)
+
+
+def sweep_forecast(base_spend, growth, years=3, max_workers=None):
+    """Total spend per year for each growth scenario.
+
+    ``base_spend`` is Year 1 spend per category and ``growth`` a
+    (scenarios x categories) array of annual rates (0.05 = 5%).
+    Returns a (scenarios x years) array.
+    """
+    growth = np.atleast_2d(np.asarray(growth, dtype="float64"))
+    shards = [growth[i:i + SCENARIOS_PER_SHARD] for i in range(0, len(growth), SCENARIOS_PER_SHARD)]
+    with SharedColumns(base_spend=np.asarray(base_spend, dtype="float64"), years=np.array([years])) as shared:
+        results = _run_shards(_forecast_kernel, shared, shards, max_workers or default_workers())
+    return np.vstack(results)
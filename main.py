@@ -3,24 +3,26 @@ import os
 import json
 import uuid
 import pandas as pd
-import matplotlib.pyplot as plt
-import openai
-from io import BytesIO
-from fpdf import FPDF
+from utils.lazy_imports import lazy_import
 from controller.controller import ITRMController
 from utils.bootstrap import page_bootstrap
 from utils.edgar_utils import fetch_revenue_from_edgar
+from utils.ingest import REQUIRED_COLUMNS, IngestError, describe_rejected, stream_components_csv
+from utils.columnar_io import FORMATS, arrow_available, export_session, format_for, frame_to_bytes, import_session, read_frame
 from utils.session_state import initialize_session
 initialize_session()
 from utils.auth import enforce_login
 enforce_login()
-from controller.supabase_controller import get_projects_by_email
+from controller.supabase_controller import get_project_by_id, list_projects_by_email
+
+# Only needed by the roadmap PDF export
+plt = lazy_import("matplotlib.pyplot")
+fpdf = lazy_import("fpdf")
 
 # ✅ MUST BE FIRST STREAMLIT COMMAND
 st.set_page_config(page_title="ITRM Main Dashboard", layout="wide")
 
 import streamlit as st
-from PIL import Image
 
 logo_url = "https://raw.githubusercontent.com/jeffrymetaflow/ITRM-Prototype-v2/main/ITRM%20Logo.png"
 
@@ -67,9 +69,9 @@ if "controller" not in st.session_state:
 
 if "project_data" not in st.session_state:
     email = "jeff@example.com"
-    projects = get_projects_by_email(email)
-    if projects:
-        project = projects[0]  # Later allow selection
+    summaries, _ = list_projects_by_email(email, page_size=1)
+    project = get_project_by_id(summaries[0]["id"]) if summaries else None  # Later allow selection
+    if project:
         st.session_state["project_data"] = project
 
         # Optional: break out fields for convenience
@@ -124,31 +126,56 @@ if step == "➕ Start New Client Assessment":
 elif step == "📂 Open Existing Project":
     st.subheader("📂 Load an Existing Project")
 
-    from controller.supabase_controller import get_projects_by_email
-
     email = st.text_input("Enter your email address to load saved projects")
 
     if email:
-        projects = get_projects_by_email(email)
-
-        if projects:
-            selected = st.selectbox("Select a project:", [p["project_name"] for p in projects])
-            project = next(p for p in projects if p["project_name"] == selected)
+        if st.session_state.get("project_list_email") != email:
+            st.session_state.project_list_email = email
+            st.session_state.project_list_page = 0
+        page = st.session_state.project_list_page
+        summaries, has_more = list_projects_by_email(email, page=page)
+
+        if summaries:
+            by_id = {p["id"]: p for p in summaries}
+            selected_id = st.selectbox(
+                "Select a project:",
+                list(by_id),
+                format_func=lambda pid: f"{by_id[pid]['project_name']}  ·  last saved {by_id[pid].get('last_saved') or 'never'}",
+            )
 
-            # Load into session_state
-            st.session_state["project_data"] = project
-            st.session_state["revenue"] = project.get("revenue")
-            st.session_state["expenses"] = project.get("expenses", {})
-            st.session_state["architecture"] = project.get("architecture", {})
-            st.session_state["maturity_score"] = project.get("maturity_score")
+            col_prev, col_page, col_next = st.columns([1, 2, 1])
+            if col_prev.button("◀ Previous", disabled=page == 0):
+                st.session_state.project_list_page = page - 1
+                st.rerun()
+            col_page.caption(f"Page {page + 1}")
+            if col_next.button("Next ▶", disabled=not has_more):
+                st.session_state.project_list_page = page + 1
+                st.rerun()
 
-            st.success(f"✅ Project '{project['project_name']}' loaded. Navigate to any tab to begin.")
+            # Only the selected project's full row (with its JSON blobs) is fetched
+            if st.session_state.get("project_data", {}).get("id") != selected_id:
+                project = get_project_by_id(selected_id)
+                if project:
+                    # Load into session_state
+                    st.session_state["project_data"] = project
+                    st.session_state["revenue"] = project.get("revenue")
+                    st.session_state["expenses"] = project.get("expenses", {})
+                    st.session_state["architecture"] = project.get("architecture", {})
+                    st.session_state["maturity_score"] = project.get("maturity_score")
+            project = st.session_state.get("project_data")
+
+            if project and project.get("id") == selected_id:
+                st.success(f"✅ Project '{project['project_name']}' loaded. Navigate to any tab to begin.")
+            else:
+                project = None
+                st.error("⚠️ Could not load the selected project. Please try again.")
         else:
+            project = None
             st.warning("No projects found for this email.")
 
         from controller.supabase_controller import delete_project_by_id
 
-        if st.button("🗑️ Delete This Project"):
+        if project and st.button("🗑️ Delete This Project"):
             confirm = st.checkbox("Confirm deletion of this project")
         
             if confirm:
@@ -271,21 +298,50 @@ else:
    
     # --- COMPONENT UPLOAD ---
     st.markdown("### 📥 Upload Components")
-    file = st.file_uploader("Upload .csv with: Name, Category, Spend, Renewal Date, Risk Score")
-    if file:
-        df = pd.read_csv(file)
-        required_cols = {"Name", "Category", "Spend", "Renewal Date", "Risk Score"}
-        if required_cols.issubset(set(df.columns)):
-            controller.set_components(df.to_dict(orient="records"))
-            st.success("✅ Components loaded.")
+    file = st.file_uploader("Upload .csv with: Name, Category, Spend, Renewal Date, Risk Score (or a .parquet/.arrow export)")
+    # Ingest each upload once, not on every rerun while it sits in the uploader
+    if file and format_for(file.name) and st.session_state.get("csv_ingested_id") != getattr(file, "file_id", file.name):
+        df = read_frame(file)
+        missing_cols = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+        if missing_cols:
+            st.error(f"Missing columns: {', '.join(missing_cols)}")
         else:
-            st.error(f"Missing columns: {required_cols - set(df.columns)}")
+            rejected = controller.set_components(df)
+            st.session_state.csv_ingested_id = getattr(file, "file_id", file.name)
+            st.success(f"✅ Components loaded: {len(df):,} rows.")
+            if rejected:
+                st.warning(describe_rejected(rejected))
+    elif file and st.session_state.get("csv_ingested_id") != getattr(file, "file_id", file.name):
+        progress = st.progress(0.0, text="Loading components...")
+
+        def show_progress(rows, rate, fraction):
+            progress.progress(fraction or 0.0, text=f"Loaded {rows:,} rows ({rate:,.0f} rows/sec)")
+
+        try:
+            stats = stream_components_csv(file, controller, on_progress=show_progress)
+            st.session_state.csv_ingested_id = getattr(file, "file_id", file.name)
+            progress.empty()
+            st.success(f"✅ Components loaded: {stats['rows']:,} rows in {stats['seconds']:.1f}s.")
+            if stats["skipped"]:
+                st.warning(f"Skipped {stats['skipped']:,} rows without a Name.")
+            if stats["rejected"]:
+                st.warning(describe_rejected(stats["rejected"]))
+        except IngestError as e:
+            progress.empty()
+            st.error(str(e))
 
     # --- COMPONENT PREVIEW ---
-    comps = controller.get_components()
-    if comps:
+    comps_df = controller.get_components_df()
+    if not comps_df.empty:
         st.markdown("### 🧩 Components Overview")
-        st.dataframe(pd.DataFrame(comps))
+        st.dataframe(comps_df)
+        if arrow_available():
+            st.download_button(
+                "⬇️ Download Components (Parquet)",
+                data=lambda: frame_to_bytes(controller.get_components_df(), "parquet"),
+                file_name="components.parquet",
+                mime="application/octet-stream"
+            )
 
     # --- SESSION REVENUE IMPACTS ---
     if "revenue_impact_by_category" not in st.session_state:
@@ -306,9 +362,7 @@ else:
 
         if submitted:
             if new_component:
-                components = st.session_state.controller.get_components()
-                components.append(new_component)
-                st.session_state.controller.set_components(components)
+                st.session_state.controller.add_component({"Name": new_component})
                 st.success(f"Added component: {new_component}")
             else:
                 st.error("Please enter a component name.")
@@ -325,9 +379,11 @@ else:
             if isinstance(data, list):
                 df = pd.DataFrame(data)
                 if validate_table(df):
-                    st.session_state.controller.set_components(df.to_dict(orient="records"))
+                    rejected = st.session_state.controller.set_components(df)
                     st.session_state["json_loaded"] = True
                     st.success("✅ JSON components loaded successfully.")
+                    if rejected:
+                        st.warning(describe_rejected(rejected))
     
     # --- PDF Upload Parsing ---
     if "pdf_loaded" not in st.session_state:
@@ -349,7 +405,7 @@ else:
                 extracted_df = pd.DataFrame(extracted_rows)
                 if validate_table(extracted_df):
                     extracted_df.columns = REQUIRED_COLUMNS
-                    st.session_state.controller.set_components(extracted_df.to_dict(orient="records"))
+                    st.session_state.controller.set_components(extracted_df)
                     st.session_state["pdf_loaded"] = True
                     st.success("✅ PDF tables extracted and loaded.")
     
@@ -384,7 +440,7 @@ else:
             if extracted_shapes:
                 df = pd.DataFrame(extracted_shapes)
                 if validate_table(df):
-                    st.session_state.controller.set_components(df.to_dict(orient="records"))
+                    st.session_state.controller.set_components(df)
                     st.session_state["visio_loaded"] = True
                     st.success("✅ Visio diagram shapes parsed and loaded.")
             else:
@@ -453,12 +509,30 @@ st.sidebar.download_button(
     mime="application/json"
 )
 
+# Columnar export: typed tables instead of stringified DataFrames
+if arrow_available():
+    bundle_format = st.sidebar.selectbox("Export Format", list(FORMATS), key="bundle_format")
+    # The deferred callable runs on a worker thread where st.session_state is
+    # unavailable, so it closes over the controller and a snapshot instead
+    export_controller = st.session_state.controller
+    export_state = dict(st.session_state)
+    st.sidebar.download_button(
+        label=f"📦 Export Session ({bundle_format.title()})",
+        data=lambda: export_session(export_controller, export_state, bundle_format),
+        file_name=f"ITRM-session-{bundle_format}.zip",
+        mime="application/zip"
+    )
+
 # Upload session to restore state
-uploaded_file = st.sidebar.file_uploader("🔁 Import Session", type="json")
-if uploaded_file is not None:
-    uploaded_state = json.load(uploaded_file)
-    for k, v in uploaded_state.items():
-        st.session_state[k] = v
+uploaded_file = st.sidebar.file_uploader("🔁 Import Session", type=["json", "zip"])
+if uploaded_file is not None and st.session_state.get("session_imported_id") != getattr(uploaded_file, "file_id", uploaded_file.name):
+    if uploaded_file.name.lower().endswith(".zip"):
+        import_session(uploaded_file, st.session_state.controller, st.session_state)
+    else:
+        uploaded_state = json.load(uploaded_file)
+        for k, v in uploaded_state.items():
+            st.session_state[k] = v
+    st.session_state.session_imported_id = getattr(uploaded_file, "file_id", uploaded_file.name)
     st.sidebar.success("✅ Session loaded!")
 
 if st.sidebar.button("🧹 Reset Session"):
@@ -475,7 +549,7 @@ if st.session_state.controller.get_components():
     st.subheader(f"🚨 AIOps Risk Insights Dashboard  |  💰 Revenue: {revenue_display}")
 
     with st.expander("🚨 View AIOps Risk Insights Dashboard", expanded=True):
-        components_df = pd.DataFrame(st.session_state.controller.get_components())
+        components_df = st.session_state.controller.get_components_df()
         components_df['Renewal Date'] = pd.to_datetime(components_df['Renewal Date'], errors='coerce')
         expiring_soon = components_df[components_df['Renewal Date'] <= pd.to_datetime('2026-06-30')]
         high_risk = components_df[components_df['Risk Score'] >= 7]
@@ -534,18 +608,17 @@ if st.session_state.controller.get_components():
                 st.metric("Projected New Risk Score", round(simulated_new_score, 1))
 
                 if st.button("💾 Save Simulated New Risk Score"):
-                    for i, comp in enumerate(st.session_state.controller.get_components()):
-                        if comp['Name'] == selected_component:
-                            st.session_state.controller.components[i]['Risk Score'] = round(simulated_new_score, 1)
-                            break
+                    index = st.session_state.controller.find_component(selected_component)
+                    if index is not None:
+                        st.session_state.controller.update_component(index, {'Risk Score': round(simulated_new_score, 1)})
                     st.success(f"Updated {selected_component}'s risk score to {round(simulated_new_score, 1)}.")
 
             if st.button("♻️ Reset All Simulated Risk Scores"):
                 for i, comp in enumerate(st.session_state.controller.get_components()):
                     if 'Original Risk Score' in comp:
-                        st.session_state.controller.components[i]['Risk Score'] = comp['Original Risk Score']
+                        st.session_state.controller.update_component(i, {'Risk Score': comp['Original Risk Score']})
                     else:
-                        st.session_state.controller.components[i]['Risk Score'] = 8
+                        st.session_state.controller.update_component(i, {'Risk Score': 8})
                         st.success("All risk scores reset to default values!")
         
  # --- Executive Summary Calculation Function ---
@@ -769,7 +842,7 @@ def generate_roadmap_pdf():
     except ImportError:
         bs4_available = False
 
-    pdf = FPDF()
+    pdf = fpdf.FPDF()
     pdf.add_page()
 
     # --- Header and Meta ---
@@ -887,7 +960,7 @@ if st.button("📄 Generate Modernization Roadmap PDF"):
         )
 
 # --- Matplotlib Component Risk Plot Fix ---
-components_df = pd.DataFrame(st.session_state.controller.get_components())
+components_df = st.session_state.controller.get_components_df()
 if not components_df.empty and "Name" in components_df and "Risk Score" in components_df:
     components_df_sorted = components_df.sort_values(by="Risk Score", ascending=True)
     components_df_sorted["Name"] = components_df_sorted["Name"].fillna("Unnamed").astype(str)
@@ -5,6 +5,7 @@ from io import BytesIO
 from fpdf import FPDF
 import uuid
 import numpy as np
+from utils.forecast_engine import forecast_matrix
 from utils.auth import enforce_login
 enforce_login()
 
@@ -413,16 +414,10 @@ if section == "💰 ITRM Financial Summary":
     revenue_input = st.session_state.revenue_input
     
     # Projected Revenue Calculation
-    projected_revenue = {}
-    for i, year in enumerate(revenue_input.keys()):
-        growth_percentage = revenue_growth[i] / 100
-        if i == 0:
-            projected_revenue[year] = revenue_input[year]
-        else:
-            previous_year = list(revenue_input.keys())[i - 1]
-            projected_revenue[year] = (
-                projected_revenue[previous_year] * (1 + growth_percentage)
-            )
+    revenue_years = list(revenue_input.keys())
+    projected_revenue = dict(zip(revenue_years, forecast_matrix(
+        revenue_input[revenue_years[0]], [g / 100 for g in revenue_growth], len(revenue_years)
+    )[:, 0].tolist()))
     
     # Display the projected revenue
     st.write("Projected Revenue:", projected_revenue)
@@ -436,13 +431,10 @@ if section == "💰 ITRM Financial Summary":
     expense_input = st.session_state.expense_input
 
     # Projected Expenses Calculation
-    projected_expenses = {}
-    for i, year in enumerate(expense_input.keys()):
-        growth_percentage = expense_growth[i] / 100
-        if i == 0:
-            projected_expenses[year] = expense_input[year]
-        else:
-            projected_expenses[year] = projected_expenses[f"Year {i}"] * (1 + growth_percentage)
+    expense_years = list(expense_input.keys())
+    projected_expenses = dict(zip(expense_years, forecast_matrix(
+        expense_input[expense_years[0]], [g / 100 for g in expense_growth], len(expense_years)
+    )[:, 0].tolist()))
 
     # Display the projected expenses
     st.write("Projected Expenses:", projected_expenses)    
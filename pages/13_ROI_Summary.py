@@ -3,11 +3,8 @@ import pandas as pd
 from datetime import date
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-from io import BytesIO
-from fpdf import FPDF
-import uuid
-import numpy as np
+from utils.lazy_imports import lazy_import
+fpdf = lazy_import("fpdf")
 from utils.bootstrap import page_bootstrap
 from utils.session_state import initialize_session
 initialize_session()
@@ -94,21 +91,25 @@ st.markdown("""
 """)
 
 # PDF Export Section
-class PDF(FPDF):
-    def header(self):
-        self.set_font("Helvetica", 'B', 14)
-        self.cell(0, 10, "ITRM ROI Summary Report", ln=True, align='C')
-        self.ln(5)
-
-    def chapter_title(self, title):
-        self.set_font("Helvetica", 'B', 12)
-        self.cell(0, 10, title, ln=True, align='L')
-        self.ln(2)
-
-    def chapter_body(self, text):
-        self.set_font("Helvetica", '', 11)
-        self.multi_cell(0, 8, text)
-        self.ln()
+def make_pdf():
+    # Defined on demand so fpdf is only imported when a report is exported
+    class PDF(fpdf.FPDF):
+        def header(self):
+            self.set_font("Helvetica", 'B', 14)
+            self.cell(0, 10, "ITRM ROI Summary Report", ln=True, align='C')
+            self.ln(5)
+
+        def chapter_title(self, title):
+            self.set_font("Helvetica", 'B', 12)
+            self.cell(0, 10, title, ln=True, align='L')
+            self.ln(2)
+
+        def chapter_body(self, text):
+            self.set_font("Helvetica", '', 11)
+            self.multi_cell(0, 8, text)
+            self.ln()
+
+    return PDF()
 
 def clean_text(text):
     return text.replace("→", "->").replace("↓", "down ").replace("↑", "up ")
@@ -118,7 +119,7 @@ if st.button("📤 Export ROI Summary as PDF"):
     payback_period = st.session_state.get("payback_period", "<6 months")
     estimated_value = st.session_state.get("estimated_value", "$6.5M")
 
-    pdf = PDF()
+    pdf = make_pdf()
     pdf.add_page()
     pdf.chapter_title("Client & Assessment Info")
     pdf.chapter_body(clean_text(
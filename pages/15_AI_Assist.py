@@ -1,16 +1,13 @@
 import streamlit as st
-import openai
-import os
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import hashlib
-from utils.intent_classifier import classify_intent
-from langchain.agents import initialize_agent, AgentType
-from langchain_openai import ChatOpenAI
-from langchain_community.tools.tavily_search.tool import TavilySearchResults
-from langchain_core.callbacks.manager import CallbackManagerForToolRun
-from utils.ai_assist import generate_maturity_recommendation_with_products
+from utils.lazy_imports import lazy_import
+plt = lazy_import("matplotlib.pyplot")
+sns = lazy_import("seaborn")
+from utils.intent_router import route_intent
+from utils.ai_assist import (
+    generate_maturity_recommendation_with_products,
+    query_langchain_product_agent,
+)
 from utils.session_state import initialize_session
 initialize_session()
 from utils.auth import enforce_login
@@ -28,50 +25,7 @@ except KeyError as e:
     st.error(f"Missing secret key: {e}")
     st.stop()
 
-# --- Set environment variable for Tavily ---
-os.environ["TAVILY_API_KEY"] = tavily_key
-
-# --- Initialize LangChain Web Agent ---
-llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0, api_key=openai_key)
-search_tool = TavilySearchResults()
-
-# 🔍 Enhanced tool for app logic awareness using live module summaries
-def fetch_module_summary(prompt: str, run_manager: CallbackManagerForToolRun = None):
-    components = st.session_state.get("components", [])
-    if not components:
-        return "No component data found to analyze."
-
-    df = pd.DataFrame(components)
-    summary = []
-    summary.append(f"You have {len(df)} components across {df['Category'].nunique()} categories.")
-    summary.append("Top categories by spend:")
-    top = df.groupby("Category")["Spend"].sum().sort_values(ascending=False).head(5)
-    for cat, val in top.items():
-        summary.append(f"- {cat}: ${val:,.0f}")
-    return "\n".join(summary)
-
-from langchain.tools import Tool
-module_summary_tool = Tool(
-    name="AppModuleSummary",
-    func=fetch_module_summary,
-    description="Provides insight into the internal application module architecture and logic."
-)
-
-agent = initialize_agent(
-    tools=[search_tool, module_summary_tool],
-    llm=llm,
-    agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-    verbose=False,
-    handle_parsing_errors=True
-)
-
-# --- Remaining logic unchanged below ---
-
-def query_langchain_product_agent(prompt):
-    try:
-        return agent.run(prompt)
-    except Exception as e:
-        return f"Error fetching product info: {str(e)}"
+# The LLM, search tool and agent are shared singletons from utils.ai_assist
 
 if "revenue" not in st.session_state:
     st.warning("Revenue not found in session state. Please complete the project setup on the main page.")
@@ -125,37 +79,6 @@ def architecture_gap_analysis(prompt):
 def tool_roi_justification(prompt):
     return "Switching to Rubrik from Commvault could reduce backup windows by 40% and lower TCO by 15% over 3 years."
 
-def fallback_classifier(prompt):
-    prompt_lower = prompt.lower()
-    if any(k in prompt_lower for k in ["compare", "alternative", "better than", "replace", "options", "suggest"]):
-        return "analyze_product"
-    elif any(k in prompt_lower for k in ["roi", "value of", "justification", "return on investment"]):
-        return "tool_roi"
-    elif any(k in prompt_lower for k in ["architecture", "best practice", "design gap", "blueprint"]):
-        return "arch_gap"
-    elif any(k in prompt_lower for k in ["it spend", "how much", "summary", "ratio"]):
-        return "report_summary"
-    elif any(k in prompt_lower for k in ["cut", "reduce", "increase", "adjust", "budget change"]):
-        return "adjust_category_forecast"
-    elif any(k in prompt_lower for k in ["risk", "vulnerability", "protection"]):
-        return "show_risk_insight"
-    elif any(k in prompt_lower for k in ["margin", "profit", "efficiency"]):
-        return "optimize_margin"
-    return "unknown"
-
-def generate_maturity_recommendation(category: str, question_summary: str = "") -> str:
-    """
-    Uses the AI assistant to generate improvement recommendations for a low-maturity category.
-    """
-    prompt = (
-        f"The IT maturity category '{category}' scored low. "
-        f"Recommend practical steps, tools, services, or best practices that could help an organization "
-        f"improve in this area. {question_summary.strip() if question_summary else ''} "
-        f"Focus on changes that could shift this maturity from 'low' to 'moderate' or 'high'."
-    )
-    response = llm.invoke(prompt)
-    return response.content.strip()
-
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
 
@@ -165,9 +88,7 @@ with st.form("chat_form"):
     submitted = st.form_submit_button("Ask")
 
 if submitted:
-    action = classify_intent(user_prompt)
-    if action == "unknown":
-        action = fallback_classifier(user_prompt)
+    action = route_intent(user_prompt)["intent"]
 
     full_prompt = contextualize(user_prompt)
     if action == "adjust_category_forecast":
@@ -1,5 +1,4 @@
 import streamlit as st
-import pandas as pd
 from controller.controller import ITRMController
 from utils.component_utils import init_session_state_from_components
 from utils.bootstrap import page_bootstrap
@@ -15,8 +14,6 @@ if "controller" not in st.session_state:
     st.session_state.controller = ITRMController()
 
 controller = st.session_state.controller
-components = controller.get_components()
-
 st.title("🧩 Component Mapping & Master Inputs")
 
 # 🏛️ Global Master Inputs (used across app)
@@ -64,8 +61,8 @@ if name and st.button("Add IT Component", key="mapping_add_button"):
   
 # 📊 Display Existing Components
 st.subheader("📋 Current Component Inventory")
-if components:
-    df = pd.DataFrame(components)
+df = controller.get_components_df()
+if not df.empty:
     st.dataframe(df)
 
     # 📊 Aggregate Spend by Category
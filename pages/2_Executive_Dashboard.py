@@ -156,7 +156,7 @@ else:
 impact_map = st.session_state.get("category_revenue_impact", {})
 
 if components:
-    df = pd.DataFrame(components)
+    df = st.session_state.controller.get_components_df()
     if not df.empty:
         # Adjust risk score using Revenue Impact % from category level
         def adjust_score(row):
@@ -263,13 +263,15 @@ st.markdown("---")
 st.markdown("## 📄 Export Summary Report")
 
 from io import BytesIO
-from fpdf import FPDF
 import tempfile
 import os
-import matplotlib.pyplot as plt
+from utils.lazy_imports import lazy_import
+
+fpdf = lazy_import("fpdf")
+plt = lazy_import("matplotlib.pyplot")
 
 if st.button("📄 Generate PDF Summary"):
-    pdf = FPDF()
+    pdf = fpdf.FPDF()
     pdf.add_page()
     pdf.set_font("Arial", size=12)
     pdf.set_title("ITRM Executive Summary")
@@ -1,6 +1,10 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
+from controller.sweep import default_workers, sweep_forecast
+from utils.columnar_io import arrow_available, frame_to_bytes
+from utils.forecast_engine import forecast_frame, period_labels
 from utils.bootstrap import page_bootstrap
 from utils.session_state import initialize_session
 initialize_session()
@@ -36,15 +40,6 @@ defaults = {
 # 🔄 Pull real component-based spend if available
 if "controller" in st.session_state:
     controller = st.session_state.controller
-    if not hasattr(controller, "get_expense_by_category"):
-        def get_expense_by_category():
-            category_totals = {}
-            for comp in controller.components:
-                category = comp.get("Category", "Unknown")
-                spend = comp.get("Spend", 0)
-                category_totals[category] = category_totals.get(category, 0) + spend
-            return category_totals
-        controller.get_expense_by_category = get_expense_by_category
     expense_by_category = controller.get_expense_by_category()
 else:
     st.warning("Controller not found in session state. Using defaults.")
@@ -71,40 +66,44 @@ for cat in categories:
     spend, growth = category_input(cat, defaults[cat][0], default_spend)
     data[cat] = {"Year 1": spend, "Growth %": growth}
 
-    # Save growth pattern across 3 years
+horizon = st.slider("Forecast Horizon (years)", 3, 10, 3)
+
+for cat in categories:
+    # Save growth pattern across the horizon
     if "category_expense_growth" not in st.session_state:
         st.session_state.category_expense_growth = {}
 
-    st.session_state.category_expense_growth[cat] = [growth / 100] * 3
+    st.session_state.category_expense_growth[cat] = [data[cat]["Growth %"] / 100] * horizon
 
 # --------------------------
-# Forecast for 3 Years
+# Forecast over the Horizon
 # --------------------------
-years = ["Year 1", "Year 2", "Year 3"]
-forecast = {"Category": [], "Year": [], "Spend": []}
-
-for cat, values in data.items():
-    y1 = values["Year 1"]
-    g = values["Growth %"] / 100
-    y2 = y1 * (1 + g)
-    y3 = y2 * (1 + g)
-    forecast["Category"].extend([cat] * 3)
-    forecast["Year"].extend(years)
-    forecast["Spend"].extend([y1, y2, y3])
-
-forecast_df = pd.DataFrame(forecast)
+years = period_labels(horizon)
+wide_df = forecast_frame(
+    {cat: values["Year 1"] for cat, values in data.items()},
+    {cat: values["Growth %"] / 100 for cat, values in data.items()},
+    horizon,
+)
+forecast_df = wide_df.melt(id_vars="Period", var_name="Category", value_name="Spend").rename(columns={"Period": "Year"})
 
 # --------------------------
 # Display Forecast Table
 # --------------------------
 st.subheader("📊 IT Spend Forecast Table")
-pivot_df = forecast_df.pivot(index="Category", columns="Year", values="Spend")
+pivot_df = forecast_df.pivot(index="Category", columns="Year", values="Spend")[years]
 st.dataframe(pivot_df.style.format("${:,.0f}"), use_container_width=True)
+if arrow_available():
+    st.download_button(
+        "⬇️ Download Forecast (Parquet)",
+        data=lambda: frame_to_bytes(wide_df, "parquet"),
+        file_name="it_spend_forecast.parquet",
+        mime="application/octet-stream"
+    )
 
 # --------------------------
 # Plot Forecast Chart
 # --------------------------
-st.subheader("📊 IT Spend Over 3 Years")
+st.subheader(f"📊 IT Spend Over {horizon} Years")
 fig = go.Figure()
 for cat in categories:
     fig.add_trace(go.Bar(
@@ -128,7 +127,7 @@ st.plotly_chart(fig, use_container_width=True)
 # IT-to-Revenue Ratio
 # --------------------------
 st.subheader("📉 IT-to-Revenue Ratio Over Time")
-it_spend_by_year = forecast_df.groupby("Year")["Spend"].sum()
+it_spend_by_year = forecast_df.groupby("Year", sort=False)["Spend"].sum()
 ratios = (it_spend_by_year / revenue).reset_index()
 ratios.columns = ["Year", "IT Spend to Revenue Ratio"]
 
@@ -199,6 +198,48 @@ if st.checkbox("Run Sensitivity Analysis"):
     )
     st.plotly_chart(fig2, use_container_width=True)
 
+# --------------------------
+# Growth Scenario Sweep
+# --------------------------
+@st.cache_data(show_spinner=False, max_entries=8)
+def growth_sweep_bands(base_spend, base_growth, n_scenarios, spread, seed, years, _workers=1):
+    """P10/P50/P90 total spend per year; reruns with the same inputs reuse it."""
+    # Each scenario perturbs every category's growth rate uniformly within ± spread
+    rng = np.random.default_rng(seed)
+    growth = np.asarray(base_growth) + rng.uniform(-spread / 100, spread / 100, size=(n_scenarios, len(base_growth)))
+    totals = sweep_forecast(np.asarray(base_spend), growth, years=years, max_workers=_workers)
+    return np.percentile(totals, [10, 50, 90], axis=0)
+
+st.subheader("🌐 Growth Scenario Sweep")
+if st.checkbox("Run Growth Scenario Sweep"):
+    col1, col2, col3, col4 = st.columns(4)
+    n_scenarios = col1.number_input("Scenarios", min_value=100, max_value=2_000_000, value=10_000, step=1_000)
+    spread = col2.slider("Growth Spread ± (pts)", 0, 50, 5)
+    seed = col3.number_input("Random Seed", min_value=0, value=42, step=1)
+    workers = col4.number_input("Worker Processes", min_value=1, max_value=default_workers(), value=1, step=1)
+
+    base_spend = tuple(float(data[cat]["Year 1"]) for cat in categories)
+    base_growth = tuple(float(data[cat]["Growth %"]) / 100 for cat in categories)
+
+    # Cached on the inputs (not the worker count, which doesn't change the result)
+    with st.spinner(f"Sweeping {int(n_scenarios):,} growth scenarios..."):
+        bands = growth_sweep_bands(base_spend, base_growth, int(n_scenarios), spread, int(seed), len(years), int(workers))
+    sweep_df = pd.DataFrame({"Year": years, "P10": bands[0], "P50": bands[1], "P90": bands[2]})
+    st.dataframe(sweep_df.set_index("Year").style.format("${:,.0f}"), use_container_width=True)
+
+    fig3 = go.Figure()
+    fig3.add_trace(go.Scatter(x=years, y=sweep_df["P90"], mode="lines", line=dict(width=0), showlegend=False))
+    fig3.add_trace(go.Scatter(x=years, y=sweep_df["P10"], mode="lines", line=dict(width=0), fill="tonexty",
+                              fillcolor="rgba(70,130,180,0.25)", name="P10–P90"))
+    fig3.add_trace(go.Scatter(x=years, y=sweep_df["P50"], mode="lines+markers", name="P50", marker=dict(color="steelblue")))
+    fig3.update_layout(
+        title="Total IT Spend Range Across Growth Scenarios",
+        xaxis_title="Year",
+        yaxis_title="Total Spend ($)",
+        height=450
+    )
+    st.plotly_chart(fig3, use_container_width=True)
+
 
 from controller.supabase_controller import save_session_to_supabase
 
@@ -6,6 +6,7 @@ initialize_session()
 from utils.auth import enforce_login
 enforce_login()
 from utils.bootstrap import page_bootstrap
+from controller.sweep import default_workers
 
 st.title("💸 Revenue at Risk Simulator")
 
@@ -21,27 +22,11 @@ try:
         st.session_state.controller = ITRMController()
     controller = st.session_state.controller
 
-    # ✅ Always add the method to calculate category-level revenue impact %
-    def get_category_impact_percentages():
-        impact_totals = {}
-        counts = {}
-        for c in controller.components:
-            cat = c.get("Category", "None")
-            impact = c.get("Revenue Impact %", 0)
-            if isinstance(impact, (int, float)):
-                impact_totals[cat] = impact_totals.get(cat, 0) + impact
-                counts[cat] = counts.get(cat, 0) + 1
-        return {
-            cat: round(impact_totals[cat] / counts[cat], 2)
-            for cat in impact_totals
-            if counts[cat] > 0
-        }
-
-    controller.get_category_impact_percentages = get_category_impact_percentages
-
-    # ✅ Force populate session state if needed
+    # ✅ Force populate session state if needed (controller keeps running per-category averages)
     if not st.session_state.get("category_revenue_impact"):
-        st.session_state["category_revenue_impact"] = controller.get_category_impact_percentages()
+        st.session_state["category_revenue_impact"] = {
+            cat: round(pct, 2) for cat, pct in controller.get_category_impact_percentages().items()
+        }
 
 except Exception as e:
     st.error(f"❌ Failed to initialize controller: {e}")
@@ -57,90 +42,145 @@ if not baseline_revenue:
 # Load category impact percentages
 category_impact_map = st.session_state.get("category_revenue_impact", {})
 
-# --- Calculate Baseline Risk Per Category ---
-category_baseline_risk = {
-    cat: baseline_revenue * (pct / 100)
-    for cat, pct in category_impact_map.items()
-    if isinstance(pct, (int, float))
-}
-
-# --- Simulate Adjustments ---
-simulated_risks = []
-adjustment_map = {}
-
-if category_baseline_risk:
-    st.subheader("⚙️ Simulate Revenue at Risk by Category")
-    for cat in sorted(category_baseline_risk.keys(), key=str):
-        base = category_baseline_risk[cat]
-        adj = st.slider(f"{cat} Adjustment %", -100, 100, 0, key=f"risk_adj_{cat}")
-        simulated = base * (1 + adj / 100)
-        simulated_risks.append({
-            "Category": cat,
-            "Baseline Risk ($)": base,
-            "Adjustment %": adj,
-            "Adjusted Risk ($)": simulated
-        })
-        adjustment_map[cat] = adj
-else:
-    st.warning("⚠️ No category revenue impact data found. Please populate revenue impact % in the Component Mapping tab.")
-    st.stop()
+simulation_mode = st.radio("Simulation Mode", ["📐 Deterministic Adjustment", "🎲 Monte Carlo"], horizontal=True)
+
+if simulation_mode == "🎲 Monte Carlo":
+    # --- Monte Carlo Revenue at Risk ---
+    st.subheader("🎲 Monte Carlo Revenue at Risk by Category")
+    st.caption("Each component fails with probability Risk Score / 100 and then loses its Revenue Impact % of baseline revenue.")
+
+    col1, col2, col3 = st.columns(3)
+    n_trials = col1.number_input("Number of Trials", min_value=1_000, max_value=5_000_000, value=100_000, step=10_000)
+    seed = col2.number_input("Random Seed", min_value=0, value=42, step=1)
+    workers = col3.number_input("Worker Processes", min_value=1, max_value=default_workers(), value=1, step=1)
+
+    if controller.get_components_df().empty:
+        st.warning("⚠️ No components found. Please add components in the Component Mapping tab.")
+        st.stop()
+
+    if st.button("▶️ Run Monte Carlo Simulation"):
+        with st.spinner(f"Running {int(n_trials):,} trials..."):
+            st.session_state["monte_carlo_results"] = controller.run_monte_carlo(
+                baseline_revenue, n_trials=int(n_trials), seed=int(seed), max_workers=int(workers)
+            )
+
+    mc_df = st.session_state.get("monte_carlo_results")
+    if mc_df is not None:
+        total = mc_df[mc_df["Category"] == "Total"].iloc[0]
+        col1, col2, col3 = st.columns(3)
+        col1.metric("P50 Revenue at Risk", f"${total['P50 ($)']:,.0f}")
+        col2.metric("P90 Revenue at Risk", f"${total['P90 ($)']:,.0f}")
+        col3.metric("P99 Revenue at Risk", f"${total['P99 ($)']:,.0f}")
+
+        st.dataframe(mc_df.set_index("Category").style.format("${:,.0f}"), use_container_width=True)
+
+        cat_df = mc_df[mc_df["Category"] != "Total"]
+        fig = go.Figure()
+        for col, color in [("P50 ($)", "gold"), ("P90 ($)", "darkorange"), ("P99 ($)", "darkred")]:
+            fig.add_trace(go.Bar(name=col.replace(" ($)", ""), x=cat_df["Category"], y=cat_df[col], marker_color=color))
+        fig.update_layout(
+            title="Monte Carlo Revenue at Risk Percentiles by Category",
+            barmode="group",
+            xaxis_title="Category",
+            yaxis_title="Revenue at Risk ($)",
+            height=460
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+        st.markdown("""
+        ### 🧠 Logic Flow Behind This Simulation
+
+        - **Failure Probability**: `Risk Score / 100` per component, drawn independently each trial.
+        - **Loss if Failed**: `Baseline Revenue × Revenue Impact %` of that component.
+        - **Trials**: Run in fixed-size NumPy batches with a fixed seed, so results are reproducible.
+        - **Percentiles**: P50/P90/P99 are estimated from streaming histograms, so memory stays flat as trials grow.
+        """)
 
-# --- Display Results ---
-sim_df = pd.DataFrame(simulated_risks)
-
-if not sim_df.empty and "Adjusted Risk ($)" in sim_df.columns:
-    total_components = len(controller.components) if hasattr(controller, "components") else 0
-    total_risk = sim_df["Adjusted Risk ($)"].sum()
-    avg_risk = sim_df["Adjusted Risk ($)"].mean()
-
-    st.markdown(f"""
-    **🧮 Total Components:** `{total_components}`  
-    **🔥 Total Simulated Revenue at Risk:** `${total_risk:,.2f}`  
-    **📊 Average Category Risk:** `${avg_risk:,.2f}`
-    """)
-
-    st.subheader("📊 Risk Simulation by Category")
-    st.dataframe(sim_df.set_index("Category").style.format({
-        "Baseline Risk ($)": "${:,.2f}",
-        "Adjustment %": "{:+.0f}%",
-        "Adjusted Risk ($)": "${:,.2f}"
-    }), use_container_width=True)
-
-    fig = go.Figure()
-    fig.add_trace(go.Bar(
-        x=sim_df["Category"],
-        y=sim_df["Adjusted Risk ($)"],
-        text=sim_df["Adjusted Risk ($)"].apply(lambda x: f"${x:,.0f}"),
-        textposition="outside",
-        marker_color="darkred"
-    ))
-    fig.update_layout(
-        title="Simulated Revenue at Risk by Category",
-        xaxis_title="Category",
-        yaxis_title="Adjusted Revenue at Risk ($)",
-        height=460
-    )
-    st.plotly_chart(fig, use_container_width=True)
-
-    with st.expander("🧾 View Category Risk Calculation Details"):
-        st.dataframe(sim_df.style.format({
+else:
+    # --- Calculate Baseline Risk Per Category ---
+    category_baseline_risk = {
+        cat: baseline_revenue * (pct / 100)
+        for cat, pct in category_impact_map.items()
+        if isinstance(pct, (int, float))
+    }
+
+    # --- Simulate Adjustments ---
+    simulated_risks = []
+    adjustment_map = {}
+
+    if category_baseline_risk:
+        st.subheader("⚙️ Simulate Revenue at Risk by Category")
+        for cat in sorted(category_baseline_risk.keys(), key=str):
+            base = category_baseline_risk[cat]
+            adj = st.slider(f"{cat} Adjustment %", -100, 100, 0, key=f"risk_adj_{cat}")
+            simulated = base * (1 + adj / 100)
+            simulated_risks.append({
+                "Category": cat,
+                "Baseline Risk ($)": base,
+                "Adjustment %": adj,
+                "Adjusted Risk ($)": simulated
+            })
+            adjustment_map[cat] = adj
+    else:
+        st.warning("⚠️ No category revenue impact data found. Please populate revenue impact % in the Component Mapping tab.")
+        st.stop()
+
+    # --- Display Results ---
+    sim_df = pd.DataFrame(simulated_risks)
+
+    if not sim_df.empty and "Adjusted Risk ($)" in sim_df.columns:
+        total_components = len(controller.get_components_df())
+        total_risk = sim_df["Adjusted Risk ($)"].sum()
+        avg_risk = sim_df["Adjusted Risk ($)"].mean()
+
+        st.markdown(f"""
+        **🧮 Total Components:** `{total_components}`  
+        **🔥 Total Simulated Revenue at Risk:** `${total_risk:,.2f}`  
+        **📊 Average Category Risk:** `${avg_risk:,.2f}`
+        """)
+
+        st.subheader("📊 Risk Simulation by Category")
+        st.dataframe(sim_df.set_index("Category").style.format({
             "Baseline Risk ($)": "${:,.2f}",
+            "Adjustment %": "{:+.0f}%",
             "Adjusted Risk ($)": "${:,.2f}"
         }), use_container_width=True)
 
-    st.markdown("""
-    ### 🧠 Logic Flow Behind This Simulation
-
-    - **Baseline Revenue Source**: Retrieved from the Main Page setup or controller fallback.
-    - **Component Mapping Page**: Revenue Impact % is averaged per category.
-    - **Baseline Risk Calculation**: `Revenue × Average Revenue Impact % per Category`
-    - **Adjustment Slider**: Lets user simulate increase/decrease in risk impact per category.
-    - **Adjusted Risk Output**: `Baseline Risk × (1 + Adjustment %)`
-    - **Visualization**: Table + Bar chart reflecting category risk before/after simulation.
-    """)
-
-else:
-    st.info("No valid simulation data to display.")
+        fig = go.Figure()
+        fig.add_trace(go.Bar(
+            x=sim_df["Category"],
+            y=sim_df["Adjusted Risk ($)"],
+            text=sim_df["Adjusted Risk ($)"].apply(lambda x: f"${x:,.0f}"),
+            textposition="outside",
+            marker_color="darkred"
+        ))
+        fig.update_layout(
+            title="Simulated Revenue at Risk by Category",
+            xaxis_title="Category",
+            yaxis_title="Adjusted Revenue at Risk ($)",
+            height=460
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+        with st.expander("🧾 View Category Risk Calculation Details"):
+            st.dataframe(sim_df.style.format({
+                "Baseline Risk ($)": "${:,.2f}",
+                "Adjusted Risk ($)": "${:,.2f}"
+            }), use_container_width=True)
+
+        st.markdown("""
+        ### 🧠 Logic Flow Behind This Simulation
+
+        - **Baseline Revenue Source**: Retrieved from the Main Page setup or controller fallback.
+        - **Component Mapping Page**: Revenue Impact % is averaged per category.
+        - **Baseline Risk Calculation**: `Revenue × Average Revenue Impact % per Category`
+        - **Adjustment Slider**: Lets user simulate increase/decrease in risk impact per category.
+        - **Adjusted Risk Output**: `Baseline Risk × (1 + Adjustment %)`
+        - **Visualization**: Table + Bar chart reflecting category risk before/after simulation.
+        """)
+
+    else:
+        st.info("No valid simulation data to display.")
 
 
 from controller.supabase_controller import save_session_to_supabase
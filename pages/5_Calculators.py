@@ -1,9 +1,9 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-from io import BytesIO
-from fpdf import FPDF
+from utils.lazy_imports import lazy_import
+plt = lazy_import("matplotlib.pyplot")
 from utils.bootstrap import page_bootstrap
+from utils.forecast_engine import forecast_frame
 from utils.session_state import initialize_session
 initialize_session()
 from utils.auth import enforce_login
@@ -43,17 +43,10 @@ if missing and section != "⚙️ Inputs Setup":
     st.stop()
 
 # ---------- Utility: Forecast Function ----------
-def forecast_values(baseline, growth_rates):
-    forecast = {}
-    for i in range(3):
-        year = f"Year {i+1}"
-        if i == 0:
-            forecast[year] = baseline
-        else:
-            prev = forecast[f"Year {i}"]
-            growth_rate = growth_rates[i] if i < len(growth_rates) else 0
-            forecast[year] = prev * (1 + growth_rate / 100)
-    return forecast
+def forecast_values(baseline, growth_rates, years=3):
+    # Year 1 is the baseline; growth_rates[i] (in %) takes Year i to Year i+1
+    frame = forecast_frame({"value": baseline}, {"value": [g / 100 for g in growth_rates]}, years)
+    return dict(zip(frame["Period"], frame["value"].tolist()))
 
 # ---------- Inputs Setup ----------
 if section == "⚙️ Inputs Setup":
@@ -62,9 +55,8 @@ if section == "⚙️ Inputs Setup":
     controller = st.session_state.get("controller", None)
     if controller and hasattr(controller, "components"):
         st.write("📊 Pulled from Component Mapping:")
-        st.dataframe(pd.DataFrame(controller.get_components()))
-    if controller and hasattr(controller, "components"):
-        df = pd.DataFrame(controller.components)
+        df = controller.get_components_df()
+        st.dataframe(df)
         default_revenue = st.session_state.get("revenue", 5_000_000)
         default_expense = df["Spend"].sum() if "Spend" in df.columns else 0
 
@@ -106,8 +98,9 @@ if section == "⚙️ Inputs Setup":
 elif section == "📊 ITRM Calculator":
     st.title("📊 ITRM Multi-Year Calculator")
 
-    revenue = forecast_values(st.session_state.revenue, st.session_state.revenue_growth)
-    expenses = forecast_values(st.session_state.it_expense, st.session_state.expense_growth)
+    horizon = st.slider("Forecast Horizon (years)", 3, 10, 3, help="Years beyond the inputs repeat the last growth rate.")
+    revenue = forecast_values(st.session_state.revenue, st.session_state.revenue_growth, horizon)
+    expenses = forecast_values(st.session_state.it_expense, st.session_state.expense_growth, horizon)
 
     st.session_state.revenue_input = revenue
     st.session_state.expense_input = expenses
@@ -1,24 +1,20 @@
 import streamlit as st
-import openai
 import os
 import json
 import pandas as pd
-import networkx as nx
-import plotly.graph_objects as go
-import matplotlib.pyplot as plt
-from PIL import Image
-import pytesseract
+from utils.lazy_imports import lazy_import
+nx = lazy_import("networkx")
+go = lazy_import("plotly.graph_objects")
 from utils.intent_classifier import classify_intent
-from langchain.agents import initialize_agent, AgentType
-from langchain_openai import ChatOpenAI
-from langchain_community.tools.tavily_search.tool import TavilySearchResults
+from utils.ai_assist import get_search_agent
+from utils.llm_cache import cached_llm_call
 from utils.bootstrap import page_bootstrap
 from utils.component_utils import get_unique_systems, get_components_by_system
 from utils.session_state import initialize_session
 from utils.auth import enforce_login
 enforce_login()
 from utils.component_utils import get_components_by_system
-from utils.vector_index import answer_with_code_context
+from utils.vector_index import answer_many_with_code_context
 from controller.controller import ITRMController
 from typing import List
 
@@ -42,40 +38,41 @@ controller = st.session_state.controller
 
 
 def generate_ai_recommendations(components: List[dict], systems: List[str]) -> dict:
-    recommendations = {}
+    prompts = []
     for system in systems:
         comps = get_components_by_system(system, components)
         comp_names = [comp.get("Name", "Unnamed") for comp in comps]
         system_summary = ", ".join(comp_names)
 
-        prompt = (
+        prompts.append(
             f"I'm working on improving an IT system named '{system}' composed of components: {system_summary}.\n"
             f"What architecture or modernization recommendations would you suggest for this system based on common patterns, performance improvements, and IT best practices?"
         )
 
-        try:
-            ai_response = answer_with_code_context(prompt)
-        except Exception as e:
-            ai_response = f"⚠️ Error calling AI: {e}"
+    # Every system's context is retrieved in one batched search, then the
+    # answers are generated concurrently
+    try:
+        answers = answer_many_with_code_context(prompts)
+    except Exception as e:
+        answers = [(None, e)] * len(prompts)
 
-        recommendations[system] = [ai_response]
+    recommendations = {}
+    for system, (ai_response, error) in zip(systems, answers):
+        recommendations[system] = [ai_response if error is None else f"⚠️ Error calling AI: {error}"]
 
     return recommendations
 
 
 # --- AI Agent: Vendor Alternative Suggestion ---
 def get_vendor_replacement_suggestion(component_name, category):
-    llm = ChatOpenAI(model_name="gpt-3.5-turbo", temperature=0.3, openai_api_key=st.secrets["openai_api_key"])
-    tools = [TavilySearchResults()]
-    agent = initialize_agent(tools, llm, agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION, verbose=False)
-
     prompt = (
         f"Act as an IT procurement strategist. For a component named '{component_name}' in category '{category}', "
         f"suggest 1-2 modern vendor alternatives and briefly explain the benefits. Include cost or lifecycle improvement if known."
     )
 
     try:
-        result = agent.run(prompt)
+        # Keyed apart from plain completions: the agent also searches the web
+        result = cached_llm_call("agent:tavily:gpt-3.5-turbo", 0.3, prompt, lambda: get_search_agent(0.3).run(prompt))
     except Exception as e:
         result = f"(AI Suggestion failed: {e})"
 
@@ -113,10 +110,9 @@ if "components" not in st.session_state:
     st.session_state.components = []  # Initialize it as an empty list
 
 controller = st.session_state.controller
-components = controller.get_components()
+df = controller.get_components_df()
 
-if components:
-    df = pd.DataFrame(components)
+if not df.empty:
     st.dataframe(df)  # or continue building graph, tables, charts from df
 else:
     st.warning("No components loaded. Please upload them on the Main page.")
@@ -137,8 +133,7 @@ with tabs[0]:
     st.header("📊 Define Components")
 
     controller = st.session_state.controller
-    components = controller.get_components()
-    df = pd.DataFrame(components) if components else pd.DataFrame(columns=["Name", "Category", "Spend", "Revenue Impact %", "Risk Score"])
+    df = controller.get_components_df()
 
     with st.expander("+ Add IT Component"):
         name = st.text_input("Component Name")
@@ -160,8 +155,7 @@ with tabs[0]:
                     "Revenue Impact %": revenue_support,
                     "Risk Score": risk_score
                 }
-                components.append(new_comp)
-                controller.set_components(components)
+                controller.add_component(new_comp)
                 st.success(f"Component '{name}' added.")
 
     with st.expander("+ Add Manual Link Between Components"):
@@ -177,8 +171,8 @@ with tabs[0]:
                     st.warning("Invalid or duplicate link.")
 
     # --- Filter by Category ---
-    if controller.get_components():
-        df = pd.DataFrame(controller.get_components())
+    df = controller.get_components_df()
+    if not df.empty:
         category_filter = st.multiselect("Filter by Category", df["Category"].unique().tolist(), default=df["Category"].unique().tolist())
         df = df[df["Category"].isin(category_filter)]
 
@@ -219,12 +213,11 @@ def safe_score_row(row):
 # --- Architecture Diagram Tab ---
 with tabs[1]:
     if "category_spend_summary" in st.session_state and "category_revenue_impact" in st.session_state:
-        components = controller.get_components()
-        if not components:
+        df = controller.get_components_df()
+        if df.empty:
             st.warning("No components found. Please define them in the Component Mapping page.")
             st.stop()
 
-        df = pd.DataFrame(components)
 
         # Merge real 'Revenue at Risk ($)' from Executive Dashboard
         cat_summary = st.session_state["category_spend_summary"].copy()
@@ -314,12 +307,12 @@ if st.session_state.components:
             if i < 3:
                 if f"ai_{row['Name']}" not in st.session_state:
                     st.session_state[f"ai_{row['Name']}"] = get_vendor_replacement_suggestion(row['Name'], row['Category'])
-                st.markdown(f"- **AI Suggested Vendors:** {st.session_state[f'ai_{row['Name']}']}")
+                st.markdown(f"- **AI Suggested Vendors:** {st.session_state['ai_' + row['Name']]}")
             else:
                 if st.button(f"Suggest Alternatives for {row['Name']}", key=f"btn_{i}"):
                     st.session_state[f"ai_{row['Name']}"] = get_vendor_replacement_suggestion(row['Name'], row['Category'])
                 if f"ai_{row['Name']}" in st.session_state:
-                    st.markdown(f"- **AI Suggested Vendors:** {st.session_state[f'ai_{row['Name']}']}")
+                    st.markdown(f"- **AI Suggested Vendors:** {st.session_state['ai_' + row['Name']]}")
     else:
         st.success("No critical components flagged for optimization.")
 
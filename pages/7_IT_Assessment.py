@@ -5,6 +5,7 @@ from utils.bootstrap import page_bootstrap
 from utils.session_state import initialize_session
 initialize_session()
 from utils.ai_assist import generate_maturity_recommendation
+from utils.fanout import fan_out
 from utils.auth import enforce_login
 enforce_login()
 
@@ -136,29 +137,40 @@ if submitted:
 
 # Clear old recommendations once
     st.session_state["it_maturity_recommendations"] = []
+    placeholders = {}
+    low_categories = []
     for _, row in score_df.iterrows():
         score = row["Score (%)"]
         category = row["Category"]
     
         if score >= 80:
             rec = f"✅ *{category}* is highly mature. Continue optimizing with automation and cross-domain integration."
-            rec_text = None
         elif score < 50:
-            with st.spinner(f"🔍 Generating AI recommendation for {category}..."):
-                rec_text = generate_maturity_recommendation(category)
-            rec = f"❌ *{category}* is low maturity.\n\n🔧 **AI Recommendation:** {rec_text}"
+            rec = f"❌ *{category}* is low maturity.\n\n🔍 Generating AI recommendation..."
+            low_categories.append(category)
         else:
             rec = f"⚠️ *{category}* shows moderate maturity. Focus on standardization, consolidation, and governance improvements."
-            rec_text = None
     
-        st.markdown(rec)
+        placeholders[category] = st.empty()
+        placeholders[category].markdown(rec)
     
         st.session_state["it_maturity_recommendations"].append({
             "category": category,
             "score": score,
-            "recommendation": rec_text
+            "recommendation": None
         })
 
+    # Low categories are generated concurrently and filled in as each finishes
+    recs_by_category = {rec["category"]: rec for rec in st.session_state["it_maturity_recommendations"]}
+    for i, rec_text, error in fan_out(generate_maturity_recommendation, low_categories):
+        category = low_categories[i]
+        if error:
+            rec_text = None
+            placeholders[category].markdown(f"❌ *{category}* is low maturity.\n\n⚠️ AI recommendation unavailable: {error}")
+        else:
+            placeholders[category].markdown(f"❌ *{category}* is low maturity.\n\n🔧 **AI Recommendation:** {rec_text}")
+        recs_by_category[category]["recommendation"] = rec_text
+
 # ---------------- Admin Tab: Edit Questions ----------------
 st.markdown("---")
 st.subheader("✏️ Edit Assessment Questions")
@@ -1,10 +1,7 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-from io import BytesIO
-from fpdf import FPDF
-import uuid
-import numpy as np
+from utils.lazy_imports import lazy_import
+plt = lazy_import("matplotlib.pyplot")
 from utils.bootstrap import page_bootstrap
 from utils.session_state import initialize_session
 initialize_session()
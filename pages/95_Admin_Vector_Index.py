@@ -1,6 +1,6 @@
 import streamlit as st
-import os
-from utils.vector_index import build_vector_index, preview_indexed_docs
+from utils.vector_index import discover_source_files, preview_indexed_docs, update_vector_index
+from utils.llm_cache import get_llm_cache
 from utils.auth import enforce_login
 enforce_login()
 
@@ -21,15 +21,15 @@ st.subheader("📂 Upload New Code or Documentation")
 uploaded_files = st.file_uploader("Upload Python or Markdown files", type=["py", "md", "txt"], accept_multiple_files=True)
 
 if uploaded_files:
-    contents = []
+    contents = {}
     for f in uploaded_files:
-        text = f.read().decode("utf-8")
-        contents.append(text)
+        text = f.getvalue().decode("utf-8")
+        contents[f.name] = text
         st.success(f"✅ Loaded: {f.name}")
     
     if st.button("🔄 Build / Refresh Vector Index"):
-        build_vector_index(contents)
-        st.success("Vector index updated successfully!")
+        index_stats = update_vector_index(uploads=contents)
+        st.success(f"Vector index updated: {index_stats['added']} added, {index_stats['updated']} changed, {index_stats['chunks']} chunks embedded.")
 
 # --- 3. Summary Chart ---
 st.subheader("📊 Module Indexing Summary")
@@ -45,14 +45,7 @@ st.warning(", ".join(missing) or "All modules indexed ✅")
 
 # --- Auto-load .py/.md/.txt files from folders ---
 def auto_discover_files():
-    file_paths = []
-    for root, _, files in os.walk("."):
-        if any(excluded in root for excluded in [".venv", "__pycache__", "vector_store", ".git"]):
-            continue
-        for file in files:
-            if file.endswith((".py", ".md", ".txt")):
-                file_paths.append(os.path.join(root, file))
-    return file_paths
+    return discover_source_files(".")
 
 if st.checkbox("🔍 Auto-load source files from project"):
     discovered = auto_discover_files()
@@ -61,23 +54,25 @@ if st.checkbox("🔍 Auto-load source files from project"):
 
 # --- Trigger build ---
 if st.button("⚙️ Build Vector Index from Source and Uploads"):
-    texts = []
-    if "discovered" in locals():
-        for path in discovered:
-            try:
-                with open(path, "r", encoding="utf-8") as f:
-                    texts.append(f.read())
-            except Exception as e:
-                st.warning(f"Skipped {path}: {e}")
+    # Files are only read (and re-embedded) if they changed since the last build
+    paths = discovered if "discovered" in locals() else []
+    texts = {}
     if uploaded_files:
         for f in uploaded_files:
             try:
-                texts.append(f.read().decode("utf-8"))
+                texts[f.name] = f.getvalue().decode("utf-8")
             except Exception as e:
                 st.warning(f"Upload error: {f.name} - {e}")
-    if texts:
-        build_vector_index(texts)
-        st.success("✅ Vector index built successfully!")
+    if paths or texts:
+        with st.spinner("Updating vector index..."):
+            index_stats = update_vector_index(files=paths, uploads=texts)
+        for error in index_stats["errors"]:
+            st.warning(f"Skipped {error}")
+        st.success(
+            f"✅ Vector index up to date: {index_stats['added']} added, {index_stats['updated']} changed, "
+            f"{index_stats['removed']} removed, {index_stats['unchanged']} unchanged "
+            f"({index_stats['chunks']} chunks embedded)."
+        )
     else:
         st.warning("No valid files found or uploaded.")
 
@@ -86,3 +81,17 @@ st.markdown("### 📚 Preview Indexed Chunks")
 for i, doc in enumerate(preview_indexed_docs()):
     with st.expander(f"Chunk {i+1}"):
         st.code(doc.page_content[:1000])
+
+# --- LLM response cache ---
+st.markdown("### 🗄️ LLM Response Cache")
+llm_cache = get_llm_cache()
+cache_stats = llm_cache.stats()
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Cached Responses", f"{cache_stats['entries']:,}")
+col2.metric("Hits", f"{cache_stats['hits']:,}")
+col3.metric("Misses", f"{cache_stats['misses']:,}")
+col4.metric("Hit Rate", f"{cache_stats['hit_rate']:.0%}")
+st.caption(f"Expired: {cache_stats['expired']:,} · Evicted: {cache_stats['evictions']:,} · Counters reset when the server restarts.")
+if st.button("🧹 Clear LLM Cache"):
+    llm_cache.clear()
+    st.success("LLM response cache cleared.")
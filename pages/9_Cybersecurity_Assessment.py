@@ -1,9 +1,11 @@
 import streamlit as st
-import matplotlib.pyplot as plt
 import pandas as pd
 from itertools import groupby
 import hashlib
 from utils.ai_assist import generate_maturity_recommendation_with_products
+from utils.fanout import fan_out
+from utils.lazy_imports import lazy_import
+plt = lazy_import("matplotlib.pyplot")
 from utils.bootstrap import page_bootstrap
 from utils.session_state import initialize_session
 initialize_session()
@@ -711,25 +713,41 @@ if section == "✅ AI Recommendations":
         st.session_state["cyber_maturity_recommendations"] = []
 
         if not cat_df.empty:
+            recs = st.session_state["cyber_maturity_recommendations"]
+            pending = []
             for _, row in cat_df.iterrows():
                 category = row["Category"]
                 score = row["Score (%)"]
 
                 if score < 80:
-                    rec_obj = generate_maturity_recommendation_with_products(category)
-                    st.session_state["cyber_maturity_recommendations"].append({
+                    pending.append(len(recs))
+                    recs.append({
                         "category": category,
                         "score": score,
-                        "recommendation": rec_obj.get("recommendation", "No suggestion returned."),
-                        "products": rec_obj.get("products", [])
+                        "recommendation": "No suggestion returned.",
+                        "products": []
                     })
                 else:
-                    st.session_state["cyber_maturity_recommendations"].append({
+                    recs.append({
                         "category": category,
                         "score": score,
                         "recommendation": "Maintain and enhance automation.",
                         "products": []
                     })
+
+            # All categories under 80 are requested at once; progress streams in as each finishes
+            if pending:
+                progress = st.progress(0.0, text=f"Generating {len(pending)} AI recommendations...")
+                categories = [recs[i]["category"] for i in pending]
+                for done, (i, rec_obj, error) in enumerate(fan_out(generate_maturity_recommendation_with_products, categories), 1):
+                    rec = recs[pending[i]]
+                    if error:
+                        rec["recommendation"] = f"AI recommendation unavailable: {error}"
+                    else:
+                        rec["recommendation"] = rec_obj.get("recommendation", "No suggestion returned.")
+                        rec["products"] = rec_obj.get("products", [])
+                    progress.progress(done / len(pending), text=f"✅ {rec['category']} ({done}/{len(pending)})")
+                progress.empty()
         else:
             st.warning("⚠️ No assessment scores found. Please complete and submit the form in the 'Inputs' tab.")
 
@@ -1,25 +1,35 @@
-import openai
 import os
 import pandas as pd
 import streamlit as st
-from langchain.agents import initialize_agent, AgentType
-from langchain_openai import ChatOpenAI
-from langchain_community.tools.tavily_search.tool import TavilySearchResults
-from langchain_core.callbacks.manager import CallbackManagerForToolRun
-from langchain.tools import Tool
-from utils.intent_classifier import classify_intent
+from utils.intent_router import route_intent
+from utils.llm_cache import cached_llm_call
+
+# The LangChain objects below are built on first use and shared by every
+# session, so pages that never touch the assistant don't pay for them.
+LLM_MODEL = "gpt-3.5-turbo"
+LLM_TEMPERATURE = 0
 
 
 # --- Load API Keys ---
-openai_key = st.secrets["openai_api_key"]
-tavily_key = st.secrets["tavily_api_key"]
-os.environ["TAVILY_API_KEY"] = tavily_key or ""
+def _openai_key():
+    return st.secrets["openai_api_key"]
+
+
+# --- LangChain singletons ---
+@st.cache_resource(show_spinner=False)
+def get_llm(model=LLM_MODEL, temperature=LLM_TEMPERATURE):
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(model=model, temperature=temperature, api_key=_openai_key())
+
 
-# --- LangChain Agent ---
-llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0, api_key=openai_key)
-search_tool = TavilySearchResults()
+@st.cache_resource(show_spinner=False)
+def get_search_tool():
+    from langchain_community.tools.tavily_search.tool import TavilySearchResults
+    os.environ["TAVILY_API_KEY"] = st.secrets["tavily_api_key"] or ""
+    return TavilySearchResults()
 
-def fetch_module_summary(prompt: str, run_manager: CallbackManagerForToolRun = None):
+
+def fetch_module_summary(prompt: str, run_manager=None):
     import streamlit as st
     components = st.session_state.get("components", [])
     if not components:
@@ -32,33 +42,59 @@ def fetch_module_summary(prompt: str, run_manager: CallbackManagerForToolRun = N
         summary.append(f"- {cat}: ${val:,.0f}")
     return "\n".join(summary)
 
-module_summary_tool = Tool(
-    name="AppModuleSummary",
-    func=fetch_module_summary,
-    description="Provides insight into the internal application module architecture and logic."
-)
 
-agent = initialize_agent(
-    tools=[search_tool, module_summary_tool],
-    llm=llm,
-    agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-    verbose=False,
-    handle_parsing_errors=True
-)
+@st.cache_resource(show_spinner=False)
+def get_agent():
+    """Web search + app module summary agent used by the AI assistant."""
+    from langchain.agents import initialize_agent, AgentType
+    from langchain.tools import Tool
+
+    module_summary_tool = Tool(
+        name="AppModuleSummary",
+        func=fetch_module_summary,
+        description="Provides insight into the internal application module architecture and logic."
+    )
+    return initialize_agent(
+        tools=[get_search_tool(), module_summary_tool],
+        llm=get_llm(),
+        agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+        verbose=False,
+        handle_parsing_errors=True
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_search_agent(temperature=0.3):
+    """Web-search-only agent (vendor and product suggestions)."""
+    from langchain.agents import initialize_agent, AgentType
+    return initialize_agent(
+        [get_search_tool()],
+        get_llm(temperature=temperature),
+        agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+        verbose=False
+    )
+
+
+def __getattr__(name):
+    # Backwards compatibility for code that used the old module-level objects
+    if name == "llm":
+        return get_llm()
+    if name == "search_tool":
+        return get_search_tool()
+    if name == "agent":
+        return get_agent()
+    if name == "openai_key":
+        return _openai_key()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def answer_with_code_context(query: str):
-    if not openai_key:
+    if not _openai_key():
         return "❌ OpenAI API key not configured."
 
+    # One shared chain and retrieval cache, in utils.vector_index
+    from utils.vector_index import answer_with_code_context as answer
     try:
-        vectorstore = load_vector_index()
-        retriever = vectorstore.as_retriever(search_type="similarity", search_kwargs={"k": 5})
-        qa = RetrievalQA.from_chain_type(
-            llm=ChatOpenAI(temperature=0, api_key=st.secrets["openai_api_key"]),
-            chain_type="stuff",
-            retriever=retriever
-        )
-        return qa.run(query)
+        return answer(query)
     except Exception as e:
         return f"❌ AI error: {e}"
 
@@ -96,28 +132,10 @@ def tool_roi_justification(prompt):
 
 def query_langchain_product_agent(prompt):
     try:
-        return agent.run(prompt)
+        return get_agent().run(prompt)
     except Exception as e:
         return f"Error fetching product info: {str(e)}"
 
-def fallback_classifier(prompt):
-    prompt_lower = prompt.lower()
-    if any(k in prompt_lower for k in ["compare", "alternative", "better than", "replace", "options", "suggest"]):
-        return "analyze_product"
-    elif any(k in prompt_lower for k in ["roi", "value of", "justification", "return on investment"]):
-        return "tool_roi"
-    elif any(k in prompt_lower for k in ["architecture", "best practice", "design gap", "blueprint"]):
-        return "arch_gap"
-    elif any(k in prompt_lower for k in ["it spend", "how much", "summary", "ratio"]):
-        return "report_summary"
-    elif any(k in prompt_lower for k in ["cut", "reduce", "increase", "adjust", "budget change"]):
-        return "adjust_category_forecast"
-    elif any(k in prompt_lower for k in ["risk", "vulnerability", "protection"]):
-        return "show_risk_insight"
-    elif any(k in prompt_lower for k in ["margin", "profit", "efficiency"]):
-        return "optimize_margin"
-    return "unknown"
-
 def generate_maturity_recommendation(category: str, question_summary: str = "") -> str:
     """
     Uses the AI assistant to generate improvement recommendations for a low-maturity category.
@@ -128,8 +146,7 @@ def generate_maturity_recommendation(category: str, question_summary: str = "")
         f"improve in this area. {question_summary.strip() if question_summary else ''} "
         f"Focus on changes that could shift this maturity from 'low' to 'moderate' or 'high'."
     )
-    response = llm.invoke(prompt)
-    return response.content.strip()
+    return cached_llm_call(LLM_MODEL, LLM_TEMPERATURE, prompt, lambda: get_llm().invoke(prompt).content.strip())
 
 def generate_maturity_recommendation_with_products(category: str) -> dict:
     """
@@ -144,23 +161,22 @@ def generate_maturity_recommendation_with_products(category: str) -> dict:
         f"{{\"recommendation\": \"...\", \"products\": [\"...\", \"...\"]}}"
     )
 
-    response = llm.invoke(prompt)
+    content = cached_llm_call(LLM_MODEL, LLM_TEMPERATURE, prompt, lambda: get_llm().invoke(prompt).content)
 
     # Parse and safely return the result
     try:
         import json
-        return json.loads(response.content)
+        return json.loads(content)
     except Exception:
         return {
-            "recommendation": response.content.strip(),
+            "recommendation": content.strip(),
             "products": []
         }
 
 # --- Central AI Assist Dispatch Function ---
 def handle_ai_consultation(user_prompt, session_state, role="CIO", goal="Optimize Costs"):
-    intent = classify_intent(user_prompt)
-    if intent == "unknown":
-        intent = fallback_classifier(user_prompt)
+    # Keyword tables first, then the local embedding router (see utils.intent_router)
+    intent = route_intent(user_prompt)["intent"]
     full_prompt = f"You are advising a {role} focused on {goal}. {user_prompt}"
 
     if intent == "adjust_category_forecast":
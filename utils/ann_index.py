@@ -0,0 +1,240 @@
+# utils/ann_index.py
+import math
+import os
+import time
+
+import numpy as np
+
+# Index type for the document vector store: "flat" (exact, the default),
+# "ivfpq" (inverted lists + product quantisation; small and fast, approximate)
+# or "hnsw" (graph search over full vectors; high recall, more memory).
+INDEX_TYPES = ("flat", "ivfpq", "hnsw")
+INDEX_TYPE = os.environ.get("ITRM_INDEX_TYPE", "flat").lower()
+
+# IVF-PQ: centroids scale with sqrt(corpus size); queries scan NPROBE lists
+IVF_NPROBE = int(os.environ.get("ITRM_IVF_NPROBE", 16))
+# Bytes per vector; by default dim / 8 (at most 64), rounded to a divisor of dim
+IVFPQ_M = int(os.environ.get("ITRM_IVFPQ_M", 0))
+IVFPQ_MIN_VECTORS = 10_000  # below this, training is unreliable and flat is fast anyway
+IVF_TRAIN_PER_LIST = 64
+IVF_MAX_TRAIN = 262_144
+
+# HNSW: graph degree and search/construction beam widths
+HNSW_M = int(os.environ.get("ITRM_HNSW_M", 32))
+HNSW_EF_CONSTRUCTION = int(os.environ.get("ITRM_HNSW_EF_CONSTRUCTION", 200))
+HNSW_EF_SEARCH = int(os.environ.get("ITRM_HNSW_EF_SEARCH", 64))
+
+# Deleting documents: flat and IVF indexes drop the vectors outright (IVF by
+# id, so other ids never shift); HNSW can't remove vectors, so deleted ones
+# stay as tombstones that searches skip. Rebuild once this share of an
+# index's vectors is dead.
+TOMBSTONE_REBUILD_FRACTION = float(os.environ.get("ITRM_TOMBSTONE_REBUILD_FRACTION", 0.2))
+
+
+def index_kind(index):
+    import faiss
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivfpq"
+    return "flat"
+
+
+def target_kind(n_vectors, index_type=None):
+    """Index type to use for a corpus of ``n_vectors``."""
+    index_type = (index_type or INDEX_TYPE).lower()
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}' (expected one of {', '.join(INDEX_TYPES)})")
+    if index_type == "ivfpq" and n_vectors < IVFPQ_MIN_VECTORS:
+        return "flat"
+    return index_type
+
+
+def ivf_nlist(n_vectors):
+    # ~4 sqrt(n) lists, but never fewer than 39 training points per centroid
+    return int(max(1, min(65_536, 4 * math.sqrt(n_vectors), n_vectors // 39)))
+
+
+def needs_rebuild(index, n_vectors, index_type=None):
+    """True if ``index`` isn't the configured type for ``n_vectors`` live
+    vectors, an IVF index has outgrown (or shrunk well below) the centroids it
+    was trained with, or too much of an HNSW graph is tombstones."""
+    import faiss
+    kind = index_kind(index)
+    if kind != target_kind(n_vectors, index_type):
+        return True
+    if kind == "ivfpq":
+        nlist = faiss.extract_index_ivf(index).nlist
+        return not nlist / 4 < ivf_nlist(n_vectors) < 2 * nlist
+    if kind == "hnsw":
+        return index.ntotal - n_vectors > TOMBSTONE_REBUILD_FRACTION * index.ntotal
+    return False
+
+
+def remove_vectors(index, ids):
+    """Delete vectors by id where the index supports it; False for HNSW,
+    whose callers keep the ids as tombstones instead."""
+    import faiss
+    if index_kind(index) == "hnsw":
+        return False
+    index.remove_ids(faiss.IDSelectorBatch(np.asarray(sorted(ids), dtype=np.int64)))
+    return True
+
+
+def add_vectors(index, vectors, next_id):
+    """Append ``vectors`` and return their ids.
+
+    Flat and HNSW number vectors by position (HNSW never shrinks, so that's
+    ``ntotal``); IVF gets explicit ids from ``next_id``, since after
+    ``remove_ids`` its ``ntotal`` would hand out ids still in use.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if index_kind(index) == "ivfpq":
+        ids = np.arange(next_id, next_id + len(vectors), dtype=np.int64)
+        index.add_with_ids(vectors, ids)
+        return ids.tolist()
+    start = index.ntotal
+    index.add(vectors)
+    return list(range(start, start + len(vectors)))
+
+
+def search_params(index, live_ids):
+    """faiss search parameters that skip HNSW tombstones (ids not in
+    ``live_ids``), or None when there is nothing to skip."""
+    import faiss
+    if index_kind(index) != "hnsw" or len(live_ids) >= index.ntotal:
+        return None
+    dead = np.setdiff1d(np.arange(index.ntotal, dtype=np.int64), np.fromiter(live_ids, dtype=np.int64, count=len(live_ids)))
+    batch = faiss.IDSelectorBatch(dead)
+    selector = faiss.IDSelectorNot(batch)
+    params = faiss.SearchParametersHNSW(sel=selector, efSearch=faiss.downcast_index(index).hnsw.efSearch)
+    # The SWIG objects only hold raw pointers to each other
+    params.referenced_objects = [batch, selector]
+    return params
+
+
+def _pq_m(dim, m=None):
+    # PQ needs the dimension split evenly into m sub-vectors; very short
+    # sub-vectors train slowly and gain little recall
+    m = m or IVFPQ_M or max(1, min(64, dim // 8))
+    return max(d for d in range(1, min(m, dim) + 1) if dim % d == 0)
+
+
+def build_index(vectors, index_type=None, seed=0):
+    """FAISS index of ``index_type`` (L2, like LangChain's default) holding
+    ``vectors`` in row order. IVF-PQ is trained on a random sample."""
+    import faiss
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, dim = vectors.shape
+    kind = target_kind(n, index_type)
+    if kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, HNSW_M)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    elif kind == "ivfpq":
+        nlist = ivf_nlist(n)
+        index = faiss.IndexIVFPQ(faiss.IndexFlatL2(dim), dim, nlist, _pq_m(dim), 8)
+        sample_size = min(n, max(IVF_TRAIN_PER_LIST * nlist, 256 * 39), IVF_MAX_TRAIN)
+        sample = vectors[np.random.default_rng(seed).choice(n, sample_size, replace=False)]
+        index.train(sample)
+    else:
+        index = faiss.IndexFlatL2(dim)
+    index.add(vectors)
+    set_search_params(index)
+    return index
+
+
+def set_search_params(index, nprobe=None, ef_search=None):
+    """Apply the recall/latency knobs (nprobe for IVF, efSearch for HNSW)."""
+    import faiss
+    kind = index_kind(index)
+    if kind == "ivfpq":
+        faiss.extract_index_ivf(index).nprobe = nprobe or IVF_NPROBE
+    elif kind == "hnsw":
+        faiss.downcast_index(index).hnsw.efSearch = ef_search or HNSW_EF_SEARCH
+    return index
+
+
+# --- Benchmark ---
+def _index_bytes(index):
+    """Approximate in-memory size (serialising a large index would copy it)."""
+    import faiss
+    kind = index_kind(index)
+    n, dim = index.ntotal, index.d
+    if kind == "ivfpq":
+        ivf = faiss.extract_index_ivf(index)
+        return n * (faiss.downcast_index(ivf).pq.code_size + 8) + ivf.nlist * dim * 4
+    if kind == "hnsw":
+        return n * (dim * 4 + 2 * HNSW_M * 4)
+    return n * dim * 4
+
+
+def _synthetic_embeddings(n, dim, rng, n_topics=1_000, latent_dim=32):
+    # Text embeddings cluster by topic and have a low intrinsic dimension;
+    # a topic mixture in a small latent space, projected up with a little
+    # noise, behaves far more like them than uniform random vectors
+    projection = rng.standard_normal((latent_dim, dim)).astype(np.float32)
+    topics = rng.standard_normal((n_topics, latent_dim)).astype(np.float32)
+    vectors = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, 100_000):
+        stop = min(n, start + 100_000)
+        latent = topics[rng.integers(0, n_topics, stop - start)] + 0.5 * rng.standard_normal((stop - start, latent_dim)).astype(np.float32)
+        vectors[start:stop] = latent @ projection + 0.1 * rng.standard_normal((stop - start, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def benchmark(n=200_000, dim=384, queries=500, k=10, settings=None, seed=0):
+    """Recall@k against exact search and per-query latency for each index
+    setting. Yields result dicts as each setting finishes."""
+    rng = np.random.default_rng(seed)
+    vectors = _synthetic_embeddings(n + queries, dim, rng)
+    vectors, query_vectors = vectors[:n], vectors[n:]
+
+    start = time.perf_counter()
+    flat = build_index(vectors, "flat")
+    flat_build = time.perf_counter() - start
+    _, truth = flat.search(query_vectors, k)
+
+    settings = settings or [
+        ("flat", {}),
+        ("ivfpq", {"nprobe": 8}), ("ivfpq", {"nprobe": 16}), ("ivfpq", {"nprobe": 64}),
+        ("hnsw", {"ef_search": 32}), ("hnsw", {"ef_search": 64}), ("hnsw", {"ef_search": 128}),
+    ]
+    built = {"flat": (flat, flat_build)}
+    for kind, params in settings:
+        if kind not in built:
+            start = time.perf_counter()
+            built[kind] = (build_index(vectors, kind, seed), time.perf_counter() - start)
+        index, build_seconds = built[kind]
+        set_search_params(index, **params)
+        latencies = []
+        found = np.empty_like(truth)
+        # One query at a time, the way retrieval calls it
+        for i in range(queries):
+            start = time.perf_counter()
+            _, found[i:i + 1] = index.search(query_vectors[i:i + 1], k)
+            latencies.append(time.perf_counter() - start)
+        recall = np.mean([len(set(found[i]) & set(truth[i])) / k for i in range(queries)])
+        yield {
+            "index": kind,
+            "params": params,
+            "recall": float(recall),
+            "p50_ms": float(np.percentile(latencies, 50) * 1e3),
+            "p95_ms": float(np.percentile(latencies, 95) * 1e3),
+            "build_s": build_seconds,
+            "bytes": _index_bytes(index),
+        }
+
+
+if __name__ == "__main__":
+    # python -m utils.ann_index [n_vectors] [dim]
+    import sys
+    n_vectors = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    dimension = int(sys.argv[2]) if len(sys.argv) > 2 else 384
+    print(f"{n_vectors:,} vectors x {dimension} dims, recall@10 vs exact search")
+    print(f"{'index':<7}{'params':<18}{'recall':>8}{'p50 ms':>9}{'p95 ms':>9}{'build s':>9}{'size MB':>9}")
+    for row in benchmark(n_vectors, dimension):
+        params = ",".join(f"{key}={value}" for key, value in row["params"].items()) or "-"
+        print(f"{row['index']:<7}{params:<18}{row['recall']:>8.3f}{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}"
+              f"{row['build_s']:>9.1f}{row['bytes'] / 1e6:>9.1f}")
@@ -1,6 +1,7 @@
 # utils/bootstrap.py
 import streamlit as st
 from utils.ai_assist import handle_ai_consultation
+from controller.supabase_controller import autosave_controls
 
 
 def page_bootstrap(current_page="Overview", required_keys=None):
@@ -20,12 +21,14 @@ def ai_assist_overlay(user_prompt, session_state, role="CIO", goal="Optimize Cos
     return handle_ai_consultation(user_prompt, session_state, role, goal)
 
 def page_bootstrap(current_page="Overview"):
+    autosave_controls()
+
     # Smart context auto-pull
     context = {
         "current_page": current_page,
         "revenue": st.session_state.get("revenue"),
         "it_expense": st.session_state.get("it_expense"),
-        "components_loaded": len(getattr(st.session_state.controller, "components", [])) if "controller" in st.session_state else 0,
+        "components_loaded": st.session_state.controller.component_count() if "controller" in st.session_state else 0,
         "revenue_growth": st.session_state.get("revenue_growth"),
         "expense_growth": st.session_state.get("expense_growth"),
     }
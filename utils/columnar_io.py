@@ -0,0 +1,146 @@
+# utils/columnar_io.py
+import io
+import json
+import zipfile
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: JSON export still works without it
+    pa = pq = None
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+# Session entries stored as tables in a bundle; everything else JSON-safe
+# goes into session.json
+ANSWER_KEYS = ("it_maturity_answers", "cybersecurity_answers")
+FRAME_KEYS = ("it_maturity_scores", "expense_forecast_df")
+
+
+def arrow_available():
+    return pa is not None
+
+
+def _require_arrow():
+    if pa is None:
+        raise RuntimeError("pyarrow is required for Parquet/Arrow files. Install it with `pip install pyarrow`.")
+
+
+def format_for(filename):
+    """'parquet' or 'arrow' from a file name, or None."""
+    name = filename.lower()
+    for fmt, ext in FORMATS.items():
+        if name.endswith(ext) or (fmt == "arrow" and name.endswith((".feather", ".ipc"))):
+            return fmt
+    return None
+
+
+def _arrow_table(df):
+    # Free-form object columns (extra component fields) can mix types,
+    # which Arrow rejects; store those as nullable strings
+    columns = {}
+    for name in df.columns:
+        col = df[name]
+        try:
+            columns[name] = pa.array(col, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            columns[name] = pa.array([None if pd.isna(v) else str(v) for v in col], type=pa.string())
+    return pa.table(columns)
+
+
+def frame_to_bytes(df, fmt="parquet"):
+    _require_arrow()
+    table = _arrow_table(df.reset_index(drop=True))
+    sink = pa.BufferOutputStream()
+    if fmt == "parquet":
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def read_frame(source, fmt=None):
+    """Load a DataFrame from a path (memory-mapped), bytes, or an uploaded file."""
+    _require_arrow()
+    if isinstance(source, str):
+        fmt = fmt or format_for(source)
+        stream = pa.memory_map(source, "r")
+    else:
+        fmt = fmt or format_for(getattr(source, "name", "")) or "parquet"
+        data = source if isinstance(source, (bytes, bytearray, memoryview)) else source.getvalue()
+        stream = pa.BufferReader(pa.py_buffer(data))
+    if fmt == "parquet":
+        table = pq.read_table(stream, memory_map=True)
+    else:
+        table = pa.ipc.open_file(stream).read_all()
+    return table.to_pandas()
+
+
+def answers_to_frame(answers):
+    # Answers mix ints, strings and lists, which one table column can't hold
+    # without stringifying them; JSON text round-trips each value exactly
+    return pd.DataFrame({"Question": list(answers), "Answer JSON": [json.dumps(v) for v in answers.values()]})
+
+
+def frame_to_answers(df):
+    if "Answer JSON" in df.columns:
+        return dict(zip(df["Question"], (json.loads(v) for v in df["Answer JSON"])))
+    # Bundles written before answers were JSON-encoded
+    return dict(zip(df["Question"], df["Answer"]))
+
+
+# --- Session bundles ---
+def export_session(controller, state, fmt="parquet"):
+    """Zip of the component inventory, assessment answers and forecast
+    frames as ``fmt`` tables, plus the remaining JSON-safe session values.
+    """
+    _require_arrow()
+    ext = FORMATS[fmt]
+    buffer = io.BytesIO()
+    # Parquet/Arrow are already compact; deflating them again only costs time
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as bundle:
+        bundle.writestr("components" + ext, frame_to_bytes(controller.get_components_df(), fmt))
+        for key in ANSWER_KEYS:
+            if state.get(key):
+                bundle.writestr(key + ext, frame_to_bytes(answers_to_frame(state[key]), fmt))
+        for key in FRAME_KEYS:
+            if isinstance(state.get(key), pd.DataFrame):
+                bundle.writestr(key + ext, frame_to_bytes(state[key], fmt))
+
+        scalars = {}
+        for key, value in state.items():
+            if key.startswith("_") or key == "controller" or key in ANSWER_KEYS or key in FRAME_KEYS:
+                continue
+            if isinstance(value, (str, int, float, bool, list, dict, type(None))):
+                scalars[key] = value
+        bundle.writestr("session.json", json.dumps(scalars, default=str))
+    return buffer.getvalue()
+
+
+def import_session(source, controller, state):
+    """Restore a bundle written by ``export_session`` into ``controller`` and ``state``."""
+    _require_arrow()
+    with zipfile.ZipFile(source) as bundle:
+        for entry in bundle.namelist():
+            key = entry.rsplit(".", 1)[0]
+            if entry == "session.json":
+                for name, value in json.loads(bundle.read(entry)).items():
+                    try:
+                        state[name] = value
+                    except Exception:
+                        # Widget-bound keys can't be set once the widget has rendered
+                        pass
+                continue
+            fmt = format_for(entry)
+            if fmt is None:
+                continue
+            df = read_frame(bundle.read(entry), fmt)
+            if key == "components":
+                controller.set_components(df)
+            elif key in ANSWER_KEYS:
+                state[key] = frame_to_answers(df)
+            elif key in FRAME_KEYS:
+                state[key] = df
@@ -1,8 +1,8 @@
 # utils/component_utils.py
 
 import streamlit as st
-import pandas as pd
 import functools
+from utils.forecast_engine import forecast_frame
 
 CATEGORY_MAP = {
     1: "Hardware",
@@ -14,8 +14,32 @@ CATEGORY_MAP = {
     7: "BC/DR"
 }
 
+def _growth_key():
+    # repr is stable for the dicts/lists of floats the growth inputs hold
+    return repr(st.session_state.get("expense_growth"))
+
+
 def init_session_state_from_components(controller):
-    df = pd.DataFrame(controller.components)
+    """Refresh the component-derived session values.
+
+    Skipped entirely on reruns where none of the inventory (tracked by
+    ``controller.data_version``), the revenue or the growth inputs changed.
+    """
+    # Default: 0% change over 3 years unless set
+    if "expense_growth" not in st.session_state:
+        st.session_state.expense_growth = {
+            cat_id: [0.0, 0.0, 0.0] for cat_id in CATEGORY_MAP
+        }
+
+    # Revenue (if controller provides it, else default)
+    get_revenue = getattr(controller, "get_revenue", None)
+    revenue = get_revenue() if get_revenue else st.session_state.get("revenue", 0)
+
+    state_key = (controller.data_version, _growth_key(), revenue)
+    if st.session_state.get("_component_state_key") == state_key:
+        return
+
+    df = controller.get_components_df()
 
     if df.empty:
         return
@@ -29,35 +53,25 @@ def init_session_state_from_components(controller):
     # Average Risk
     st.session_state.average_risk = df["Risk Score"].mean()
 
-    # Revenue (if controller provides it, else default)
-    st.session_state.revenue = controller.get_revenue()
+    st.session_state.revenue = revenue
 
-    # Expenses by Category ID (mapped to name)
-    expense_by_category = df.groupby("Category")["Spend"].sum().to_dict()
+    # Expenses by Category ID (mapped to name), from the running aggregates
+    expense_by_category = controller.get_expense_by_category()
     st.session_state.expense_by_category = {
         cat_id: expense_by_category.get(CATEGORY_MAP[cat_id], 0)
         for cat_id in CATEGORY_MAP
     }
 
-    # Default: 0% change over 3 years unless set
-    if "expense_growth" not in st.session_state:
-        st.session_state.expense_growth = {
-            cat_id: [0.0, 0.0, 0.0] for cat_id in CATEGORY_MAP
-        }
-
-    # Future Forecast Table (optional, to be built per page)
-    forecast_df = pd.DataFrame({
-        "Year": [2024, 2025, 2026]
-    })
-    for cat_id, name in CATEGORY_MAP.items():
-        base = st.session_state.expense_by_category[cat_id]
-        growth = st.session_state.expense_growth[cat_id]
-        forecast_df[name] = [
-            base * (1 + growth[0]),
-            base * (1 + growth[0]) * (1 + growth[1]),
-            base * (1 + growth[0]) * (1 + growth[1]) * (1 + growth[2]),
-        ]
-    st.session_state.expense_forecast_df = forecast_df
+    # Future Forecast (session export picks this up); first-year growth
+    # applies to 2024 itself, unlike the page calculators
+    st.session_state.expense_forecast_df = forecast_frame(
+        {name: st.session_state.expense_by_category[cat_id] for cat_id, name in CATEGORY_MAP.items()},
+        {name: st.session_state.expense_growth[cat_id] for cat_id, name in CATEGORY_MAP.items()},
+        years=3,
+        start_year=2024,
+        compound_first=True,
+    ).rename(columns={"Period": "Year"})
+    st.session_state._component_state_key = state_key
 
 def require_component_data(func):
     @functools.wraps(func)
@@ -1,4 +1,3 @@
-from sec_edgar_downloader import Downloader
 from utils.ai_assist import answer_with_code_context  # ✅ clean, refactored
 import os
 import re
@@ -15,6 +14,7 @@ def fetch_latest_10k_text(ticker: str) -> str:
     """
     try:
         # Initialize the downloader
+        from sec_edgar_downloader import Downloader
         dl = Downloader()
         dl.get("10-K", ticker.upper(), amount=1)
 
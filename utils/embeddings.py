@@ -0,0 +1,191 @@
+# utils/embeddings.py
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import closing
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from utils.fanout import fan_out
+
+DEFAULT_CACHE_DIR = os.path.join("data", "embedding_cache")
+DEFAULT_BATCH_SIZE = int(os.environ.get("ITRM_EMBED_BATCH_SIZE", 64))
+DEFAULT_CONCURRENCY = int(os.environ.get("ITRM_EMBED_CONCURRENCY", 4))
+DEFAULT_BATCH_TIMEOUT = float(os.environ.get("ITRM_EMBED_TIMEOUT", 300))
+
+
+def chunk_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """On-disk vectors for one embedding model, keyed by chunk text hash.
+
+    Vectors are stored as float16 rows in ``vectors.f16`` and read through a
+    memory map; ``keys.txt`` holds the hash of each row. Both files are only
+    appended to, vectors first, so an interrupted write at worst leaves rows
+    without keys; loading trims them off so rows and keys line up again.
+    """
+
+    def __init__(self, model_name, cache_dir=DEFAULT_CACHE_DIR):
+        self.model_name = model_name
+        self.path = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+        os.makedirs(self.path, exist_ok=True)
+        self._vectors_path = os.path.join(self.path, "vectors.f16")
+        self._keys_path = os.path.join(self.path, "keys.txt")
+        self._meta_path = os.path.join(self.path, "meta.json")
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._vectors = None
+        self.dim = None
+        self.hits = self.misses = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self._meta_path):
+            return
+        with open(self._meta_path, encoding="utf-8") as f:
+            self.dim = json.load(f)["dim"]
+        with open(self._keys_path, encoding="utf-8") as f:
+            text = f.read()
+        if text and not text.endswith("\n"):
+            # A key cut off mid-line would merge with the next one appended
+            text = text[:text.rfind("\n") + 1]
+            with open(self._keys_path, "w", encoding="utf-8") as f:
+                f.write(text)
+        keys = text.split()
+        row_bytes = self.dim * 2
+        stored_rows = os.path.getsize(self._vectors_path) // row_bytes
+        if len(keys) > stored_rows:
+            keys = keys[:stored_rows]
+            with open(self._keys_path, "w", encoding="utf-8") as f:
+                f.write("".join(key + "\n" for key in keys))
+        # Cut off rows written without their key (and any partial row), so
+        # the next append lands at row len(keys) as put_many assumes
+        if os.path.getsize(self._vectors_path) != len(keys) * row_bytes:
+            os.truncate(self._vectors_path, len(keys) * row_bytes)
+        self._rows = {key: row for row, key in enumerate(keys)}
+        self._remap()
+
+    def _remap(self):
+        rows = len(self._rows)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float16, mode="r", shape=(rows, self.dim)) if rows else None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def get_many(self, keys):
+        """``{key: float32 vector}`` for the keys that are cached."""
+        with self._lock:
+            found = {key: self._rows[key] for key in keys if key in self._rows}
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            if not found:
+                return {}
+            vectors = np.asarray(self._vectors[list(found.values())], dtype=np.float32)
+        return dict(zip(found, vectors))
+
+    def put_many(self, items):
+        """Store ``{key: vector}``; keys already cached are ignored."""
+        with self._lock:
+            items = {key: vector for key, vector in items.items() if key not in self._rows}
+            if not items:
+                return
+            matrix = np.asarray(list(items.values()), dtype=np.float16)
+            if self.dim is None:
+                self.dim = matrix.shape[1]
+                with open(self._meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"model": self.model_name, "dim": self.dim}, f)
+            with open(self._vectors_path, "ab") as f:
+                f.write(matrix.tobytes())
+            with open(self._keys_path, "a", encoding="utf-8") as f:
+                f.write("".join(key + "\n" for key in items))
+            start = len(self._rows)
+            self._rows.update((key, start + i) for i, key in enumerate(items))
+            self._remap()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "vectors": len(self._rows),
+            "bytes": len(self._rows) * (self.dim or 0) * 2,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that batches document embedding and caches vectors.
+
+    Uncached chunks are deduplicated, split into ``batch_size`` batches and
+    sent to ``base.embed_documents`` with up to ``max_concurrency`` batches in
+    flight. Every returned vector goes through float16, so a chunk gets the
+    same vector whether or not it came from the cache. Queries aren't cached.
+    """
+
+    def __init__(self, base, model_name, cache=None, batch_size=DEFAULT_BATCH_SIZE,
+                 max_concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_BATCH_TIMEOUT):
+        self.base = base
+        self.model_name = model_name
+        self.cache = cache if cache is not None else EmbeddingCache(model_name)
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+
+    def embed_documents(self, texts):
+        return self.embed_array(texts).tolist()
+
+    def embed_array(self, texts):
+        """Vectors for ``texts`` as one float32 array (no per-float Python objects)."""
+        keys = [chunk_hash(text) for text in texts]
+        vectors = self.cache.get_many(keys)
+        missing = list({key: text for key, text in zip(keys, texts) if key not in vectors}.items())
+        batches = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+
+        def embed(batch):
+            return self.base.embed_documents([text for _, text in batch])
+
+        # fan_out starts a batch only as another finishes; closing it on the
+        # first error means no further batches are sent
+        with closing(fan_out(embed, batches, self.max_concurrency, self.timeout)) as results:
+            for index, result, error in results:
+                if error:
+                    raise error
+                new = {key: np.asarray(vector, dtype=np.float16).astype(np.float32) for (key, _), vector in zip(batches[index], result)}
+                self.cache.put_many(new)
+                vectors.update(new)
+        if not keys:
+            return np.empty((0, self.cache.dim or 0), dtype=np.float32)
+        return np.stack([vectors[key] for key in keys])
+
+    def embed_query(self, text):
+        return self.base.embed_query(text)
+
+    def embed_queries(self, texts):
+        """Uncached query vectors for several questions in one request."""
+        if not texts:
+            return np.empty((0, self.cache.dim or 0), dtype=np.float32)
+        return np.asarray(self.base.embed_documents(list(texts)), dtype=np.float32)
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """Local CPU embeddings with sentence-transformers; no network after the
+    model has been downloaded once (or copied into the HF cache)."""
+
+    def __init__(self, model_name="sentence-transformers/all-MiniLM-L6-v2", device="cpu", batch_size=32):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device=device)
+        self.batch_size = batch_size
+
+    def embed_documents(self, texts):
+        return self.model.encode(
+            list(texts), batch_size=self.batch_size, normalize_embeddings=True, convert_to_numpy=True
+        ).tolist()
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
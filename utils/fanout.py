@@ -0,0 +1,57 @@
+# utils/fanout.py
+import os
+import queue
+import threading
+import time
+
+# Defaults for AI fan-outs; override per call or with these env vars
+DEFAULT_CONCURRENCY = int(os.environ.get("ITRM_AI_CONCURRENCY", 4))
+DEFAULT_TIMEOUT = float(os.environ.get("ITRM_AI_TIMEOUT", 60))
+
+
+class FanOutTimeout(TimeoutError):
+    pass
+
+
+def fan_out(fn, items, max_concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT):
+    """Call ``fn(item)`` for every item on worker threads, yielding
+    ``(index, result, error)`` in completion order.
+
+    At most ``max_concurrency`` calls are in flight; the next item is only
+    started when one of them finishes, and nothing more is started once the
+    caller stops iterating. Each call gets ``timeout`` seconds from the
+    moment it starts; a call that overruns is reported with a FanOutTimeout
+    and abandoned, and its place goes to the next item. Its thread can't be
+    interrupted, but nothing waits for it.
+    """
+    items = list(items)
+    limit = max(1, max_concurrency)
+    results = queue.Queue()
+    in_flight = {}  # index -> start time
+    next_index = 0
+
+    def run(index):
+        try:
+            results.put((index, fn(items[index]), None))
+        except Exception as e:
+            results.put((index, None, e))
+
+    while next_index < len(items) or in_flight:
+        while next_index < len(items) and len(in_flight) < limit:
+            in_flight[next_index] = time.monotonic()
+            # One short-lived daemon thread per call rather than a pool: an
+            # abandoned call must not hold a worker the next item needs
+            threading.Thread(target=run, args=(next_index,), daemon=True).start()
+            next_index += 1
+        try:
+            index, result, error = results.get(timeout=0.25)
+            # Calls already reported as timed out are dropped
+            if in_flight.pop(index, None) is not None:
+                yield index, result, error
+        except queue.Empty:
+            pass
+        now = time.monotonic()
+        for index, started in list(in_flight.items()):
+            if now - started > timeout:
+                del in_flight[index]
+                yield index, None, FanOutTimeout(f"No response after {timeout:.0f}s")
@@ -0,0 +1,82 @@
+# utils/forecast_engine.py
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+GRANULARITIES = {"year": 1, "month": 12}
+
+
+def rate_schedule(growth, n_series, years):
+    """(series x years) annual growth rates from a scalar, one rate per series,
+    or a per-year list per series.
+
+    A 1-D input of length ``n_series`` is read as one rate per series, any
+    other 1-D input as a per-year list shared by every series. Per-year lists
+    shorter than the horizon repeat their last rate.
+    """
+    rates = np.asarray(growth, dtype="float64")
+    if rates.ndim == 0:
+        return np.full((n_series, years), float(rates))
+    if rates.ndim == 1:
+        rates = rates[:, None] if len(rates) == n_series else rates[None, :].repeat(n_series, axis=0)
+    if rates.shape[1] == 0:
+        return np.zeros((n_series, years))
+    if rates.shape[1] < years:
+        pad = np.repeat(rates[:, -1:], years - rates.shape[1], axis=1)
+        rates = np.hstack([rates, pad])
+    return rates[:, :years]
+
+
+def growth_factors(rates, granularity="year", compound_first=False):
+    """Cumulative growth multipliers, (series x periods), from annual rates.
+
+    ``rates[:, t]`` is the rate applied going into year ``t`` (each month of
+    year ``t`` for monthly periods, as (1 + r) ** (1 / 12)). With
+    ``compound_first=False`` the first period is the baseline itself;
+    otherwise growth already applies to it.
+    """
+    steps = GRANULARITIES[granularity]
+    step = (1 + np.repeat(rates, steps, axis=1)) ** (1 / steps)
+    if not compound_first:
+        step[:, 0] = 1.0
+    return np.cumprod(step, axis=1)
+
+
+def period_labels(years, granularity="year", start_year=None):
+    if granularity == "month":
+        if start_year is None:
+            return [f"Year {y + 1} M{m + 1:02d}" for y in range(years) for m in range(12)]
+        return [f"{start_year + y}-{m + 1:02d}" for y in range(years) for m in range(12)]
+    if start_year is None:
+        return [f"Year {y + 1}" for y in range(years)]
+    return [start_year + y for y in range(years)]
+
+
+def forecast_matrix(base, growth, years=3, granularity="year", compound_first=False):
+    """Forecast every series at once; returns a (periods x series) array.
+
+    ``base`` is the starting value per series (annual amounts are spread
+    evenly across months for monthly granularity) and ``growth`` fractional
+    annual rates in any shape ``rate_schedule`` accepts.
+    """
+    base = np.atleast_1d(np.asarray(base, dtype="float64"))
+    rates = rate_schedule(growth, len(base), years)
+    factors = growth_factors(rates, granularity, compound_first)
+    return (factors * (base / GRANULARITIES[granularity])[:, None]).T
+
+
+@st.cache_data(show_spinner=False)
+def forecast_frame(base, growth, years=3, granularity="year", start_year=None, compound_first=False):
+    """Cached forecast table: one row per period, one column per series.
+
+    ``base`` maps series name to its starting value and ``growth`` maps
+    series name to a rate or per-year list of rates (fractions); names
+    missing from ``growth`` stay flat. Identical inputs from any page reuse
+    the same result.
+    """
+    names = list(base)
+    rates = np.vstack([rate_schedule(growth.get(name, 0.0), 1, years) for name in names]) if names else np.zeros((0, years))
+    values = forecast_matrix([base[name] for name in names], rates, years, granularity, compound_first)
+    frame = pd.DataFrame(values, columns=names)
+    frame.insert(0, "Period", period_labels(years, granularity, start_year))
+    return frame
@@ -0,0 +1,93 @@
+# utils/ingest.py
+import time
+
+import pandas as pd
+
+from controller.component_store import ComponentStore
+
+REQUIRED_COLUMNS = ("Name", "Category", "Spend", "Renewal Date", "Risk Score")
+
+# Fields are pinned so pandas never has to infer them chunk by chunk. The
+# numeric ones stay text because exports carry "$1,200", "20%" or "High";
+# the component store converts each chunk to float64 and turns anything it
+# can't parse into a missing value, as it does for a whole-file upload.
+CSV_DTYPES = {
+    "Name": str,
+    "Category": str,
+    "System": str,
+    "Spend": str,
+    "Risk Score": str,
+    "Revenue Impact %": str,
+}
+
+DEFAULT_CHUNK_ROWS = 50_000
+
+
+class IngestError(ValueError):
+    """Raised when an upload can't be ingested; ``rows`` were read before it
+    failed (none of them reach the controller)."""
+
+    def __init__(self, message, rows=0):
+        super().__init__(message)
+        self.rows = rows
+
+
+def describe_rejected(rejected):
+    """User-facing note for ``{column: cells}`` that were left blank, or None."""
+    if not rejected:
+        return None
+    cells = ", ".join(f"{name}: {count:,}" for name, count in rejected.items())
+    return f"Some values couldn't be read and were left blank ({cells})."
+
+
+def _file_size(file):
+    size = getattr(file, "size", None)
+    if size is None and hasattr(file, "seek"):
+        pos = file.tell()
+        size = file.seek(0, 2)
+        file.seek(pos)
+    return size or 0
+
+
+def stream_components_csv(file, controller, chunksize=DEFAULT_CHUNK_ROWS, on_progress=None):
+    """Load a component CSV into ``controller`` chunk by chunk.
+
+    Each chunk is validated and appended to a staging component store, so
+    only one chunk is ever held as a DataFrame. The staging store replaces
+    the controller's inventory only after the last chunk has loaded; a
+    failure anywhere leaves the existing inventory untouched. Rows without a
+    Name are skipped and counted, as are cells that couldn't be converted to
+    their column's type (stored as missing).
+
+    ``on_progress(rows, rows_per_sec, fraction)`` is called after every chunk.
+    Returns {"rows", "skipped", "rejected", "seconds"}, with ``rejected`` as
+    {column: cells}.
+    """
+    size = _file_size(file)
+    started = time.perf_counter()
+    rows = skipped = 0
+    rejected = {}
+    staging = ComponentStore()
+    try:
+        reader = pd.read_csv(file, chunksize=chunksize, dtype=CSV_DTYPES)
+        for chunk in reader:
+            missing = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+            if missing:
+                raise IngestError(f"Missing columns: {', '.join(missing)}", rows)
+            named = chunk["Name"].notna()
+            if not named.all():
+                skipped += int((~named).sum())
+                chunk = chunk[named]
+            for name, cells in staging.extend_frame(chunk).items():
+                rejected[name] = rejected.get(name, 0) + cells
+            rows += len(chunk)
+            if on_progress:
+                elapsed = max(time.perf_counter() - started, 1e-9)
+                fraction = min(file.tell() / size, 1.0) if size and hasattr(file, "tell") else None
+                on_progress(rows, rows / elapsed, fraction)
+    except IngestError:
+        raise
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, ValueError) as e:
+        raise IngestError(f"Could not parse CSV after {rows:,} rows: {e}", rows) from e
+    controller.swap_component_store(staging)
+    return {"rows": rows, "skipped": skipped, "rejected": rejected, "seconds": time.perf_counter() - started}
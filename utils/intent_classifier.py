@@ -1,7 +1,10 @@
 # intent_classifier.py
 
+import csv
+import os
 import re
 
+# Primary table: keywords match whole words only
 intent_keywords = {
     "report_summary": ["spending", "how much", "summary", "ratio"],
     "adjust_category_forecast": ["increase", "decrease", "reduce", "raise", "adjust"],
@@ -10,10 +13,118 @@ intent_keywords = {
     "optimize_margin": ["margin", "improve margin", "profit"]
 }
 
+# Fallback table: checked only when nothing above matched; keywords match
+# anywhere in the text, so "suggestions" counts as "suggest"
+fallback_keywords = {
+    "analyze_product": ["compare", "alternative", "better than", "replace", "options", "suggest"],
+    "tool_roi": ["roi", "value of", "justification", "return on investment"],
+    "arch_gap": ["architecture", "best practice", "design gap", "blueprint"],
+    "report_summary": ["it spend", "how much", "summary", "ratio"],
+    "adjust_category_forecast": ["cut", "reduce", "increase", "adjust", "budget change"],
+    "show_risk_insight": ["risk", "vulnerability", "protection"],
+    "optimize_margin": ["margin", "profit", "efficiency"]
+}
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "intent_corpus.csv")
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+class IntentMatcher:
+    """All intent keywords compiled into one regex, matched in a single pass.
+
+    ``tables`` is a list of ``(keywords_by_intent, whole_words)``. Priority
+    follows table order, then intent order within a table, so the result is
+    the same as checking each table's intents in turn; but the text is
+    scanned once however many keywords there are.
+    """
+
+    def __init__(self, tables):
+        # keyword -> [(priority, intent, whole_words)]
+        self._entries = {}
+        self._intents = []
+        for keywords_by_intent, whole_words in tables:
+            for intent, keywords in keywords_by_intent.items():
+                priority = len(self._intents)
+                self._intents.append(intent)
+                for keyword in keywords:
+                    self._entries.setdefault(keyword.lower(), []).append((priority, intent, whole_words))
+        # Longest first, and a lookahead so overlapping keywords are all seen
+        # ("at risk" and "risk"); keywords that are prefixes of a longer match
+        # at the same position are picked up from _prefixes
+        alternation = "|".join(re.escape(k) for k in sorted(self._entries, key=len, reverse=True))
+        self._pattern = re.compile(f"(?=({alternation}))")
+        self._prefixes = {
+            keyword: [other for other in self._entries if other != keyword and keyword.startswith(other)]
+            for keyword in self._entries
+        }
+
+    def classify(self, text):
+        text = text.lower()
+        best = None
+        for match in self._pattern.finditer(text):
+            start = match.start()
+            found = match.group(1)
+            for keyword in [found, *self._prefixes[found]]:
+                end = start + len(keyword)
+                for priority, intent, whole_words in self._entries[keyword]:
+                    if best is not None and priority >= best[0]:
+                        continue
+                    if whole_words and (
+                        (start > 0 and _is_word_char(text[start - 1]))
+                        or (end < len(text) and _is_word_char(text[end]))
+                    ):
+                        continue
+                    best = (priority, intent)
+            if best is not None and best[0] == 0:
+                break
+        return best[1] if best else "unknown"
+
+
+# Shared by the AI assistant dispatchers (utils.ai_assist and page 15)
+_matcher = IntentMatcher([(intent_keywords, True), (fallback_keywords, False)])
+
+
 def classify_intent(prompt):
-    for intent, keywords in intent_keywords.items():
-        for keyword in keywords:
-            if re.search(rf"\\b{re.escape(keyword)}\\b", prompt.lower()):
+    return _matcher.classify(prompt)
+
+
+def load_corpus(path=CORPUS_PATH):
+    """Labelled example prompts: a list of ``(prompt, intent)``."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return [(row["prompt"], row["intent"]) for row in csv.DictReader(f)]
+
+
+if __name__ == "__main__":
+    # python -m utils.intent_classifier: accuracy on the labelled corpus and
+    # a micro-benchmark against matching each keyword with its own regex
+    import time
+
+    def keyword_by_keyword(prompt):
+        prompt_lower = prompt.lower()
+        for intent, keywords in intent_keywords.items():
+            for keyword in keywords:
+                if re.search(rf"\b{re.escape(keyword)}\b", prompt_lower):
+                    return intent
+        for intent, keywords in fallback_keywords.items():
+            if any(k in prompt_lower for k in keywords):
                 return intent
-    return "unknown"
+        return "unknown"
+
+    corpus = load_corpus()
+    wrong = [(prompt, label, classify_intent(prompt)) for prompt, label in corpus if classify_intent(prompt) != label]
+    print(f"Accuracy: {1 - len(wrong) / len(corpus):.1%} on {len(corpus)} labelled prompts")
+    for prompt, label, got in wrong:
+        print(f"  expected {label:<26} got {got:<26} {prompt}")
+    disagree = [prompt for prompt, _ in corpus if keyword_by_keyword(prompt) != classify_intent(prompt)]
+    print(f"Disagreements with keyword-by-keyword matching: {len(disagree)}")
 
+    prompts = [prompt for prompt, _ in corpus] * 200
+    for name, classify in (("compiled single pass", classify_intent), ("keyword by keyword", keyword_by_keyword)):
+        start = time.perf_counter()
+        for prompt in prompts:
+            classify(prompt)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<22} {elapsed / len(prompts) * 1e6:6.1f} µs/prompt")
@@ -0,0 +1,158 @@
+# utils/intent_router.py
+import logging
+import os
+import time
+
+import numpy as np
+import streamlit as st
+
+from utils.intent_classifier import classify_intent, load_corpus
+
+# Handlers and levels are left to the app's logging configuration
+logger = logging.getLogger(__name__)
+
+# Small CPU model; loaded once per process from the local Hugging Face cache
+ROUTER_MODEL = os.environ.get("ITRM_ROUTER_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+# Cosine similarity to the nearest intent centroid needed to route a prompt,
+# and how far ahead of the runner-up that centroid must be
+ROUTER_THRESHOLD = float(os.environ.get("ITRM_ROUTER_THRESHOLD", 0.45))
+ROUTER_MARGIN = float(os.environ.get("ITRM_ROUTER_MARGIN", 0.05))
+
+# Intents answered by the LangChain/Tavily agent; every other intent has a local handler
+NETWORK_INTENTS = {"analyze_product"}
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / (np.linalg.norm(vectors, axis=-1, keepdims=True) + 1e-12)
+
+
+def intent_centroids(vectors, labels):
+    """``(intents, centroids)``: one unit vector per intent, the normalised
+    mean of its examples' embeddings."""
+    intents = list(dict.fromkeys(labels))
+    labels = np.asarray(labels)
+    vectors = _normalize(vectors)
+    return intents, _normalize(np.stack([vectors[labels == intent].mean(axis=0) for intent in intents]))
+
+
+def nearest_intent(similarities, intents, threshold=ROUTER_THRESHOLD, margin=ROUTER_MARGIN):
+    """``(intent, confidence)`` for a row of centroid similarities; intent is
+    None when the best match is too weak or too close to the runner-up."""
+    order = np.argsort(similarities)[::-1]
+    confidence = float(similarities[order[0]])
+    lead = confidence - float(similarities[order[1]]) if len(order) > 1 else confidence
+    if confidence < threshold or lead < margin:
+        return None, confidence
+    return intents[order[0]], confidence
+
+
+class IntentRouter:
+    """Nearest-centroid intent classifier over local sentence embeddings.
+
+    Centroids are built once from labelled example prompts (by default
+    data/intent_corpus.csv, including the "unknown" examples, so small talk
+    is recognised as such). Routing a prompt is one embedding on the CPU and
+    a dot product per intent; nothing goes over the network.
+    """
+
+    def __init__(self, embeddings, examples, threshold=ROUTER_THRESHOLD, margin=ROUTER_MARGIN):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.margin = margin
+        prompts = [prompt for prompt, _ in examples]
+        labels = [intent for _, intent in examples]
+        self.intents, self.centroids = intent_centroids(embeddings.embed_documents(prompts), labels)
+
+    def predict(self, prompt):
+        vector = _normalize(self.embeddings.embed_query(prompt))
+        return nearest_intent(self.centroids @ vector, self.intents, self.threshold, self.margin)
+
+
+@st.cache_resource(show_spinner=False)
+def get_intent_router():
+    """Shared router, or None if the local model can't be loaded (routing
+    then falls back to the keyword tables alone)."""
+    try:
+        from utils.embeddings import SentenceTransformerEmbeddings
+        start = time.perf_counter()
+        router = IntentRouter(SentenceTransformerEmbeddings(ROUTER_MODEL), load_corpus())
+        logger.info("intent router ready: %s, %d intents, %.0f ms", ROUTER_MODEL, len(router.intents),
+                    (time.perf_counter() - start) * 1e3)
+        return router
+    except Exception as e:
+        logger.warning("intent router disabled, using keywords only: %s", e)
+        return None
+
+
+def route_intent(prompt, router=None):
+    """Routing decision for a prompt, as a dict with ``intent`` and how it was reached.
+
+    The keyword tables go first; an intent with a local handler is taken as
+    is. A prompt they can't place, or would send to the network agent, is
+    then put to the embedding router, and its answer wins when it's
+    confident. So the agent is only reached when the router agrees or
+    can't tell, and a confident "unknown" stays off the network too.
+    """
+    start = time.perf_counter()
+    keyword_intent = classify_intent(prompt)
+    decision = {"intent": keyword_intent, "source": "keywords", "keyword_intent": keyword_intent, "confidence": None}
+    if keyword_intent == "unknown" or keyword_intent in NETWORK_INTENTS:
+        router = router or get_intent_router()
+        if router is not None:
+            try:
+                routed, decision["confidence"] = router.predict(prompt)
+            except Exception as e:
+                logger.warning("intent router failed, using keywords: %s", e)
+                routed = None
+            if routed is not None:
+                decision.update(intent=routed, source="embedding")
+    decision["network"] = decision["intent"] in NETWORK_INTENTS
+    decision["latency_ms"] = (time.perf_counter() - start) * 1e3
+    # Prompt text stays out of the logs; the decision is enough to tune routing
+    logger.info(
+        "intent=%s source=%s keyword=%s confidence=%s network=%s latency_ms=%.2f",
+        decision["intent"], decision["source"], keyword_intent,
+        "-" if decision["confidence"] is None else f"{decision['confidence']:.3f}",
+        decision["network"], decision["latency_ms"],
+    )
+    return decision
+
+
+if __name__ == "__main__":
+    # python -m utils.intent_router: leave-one-out accuracy on the labelled
+    # corpus (each prompt routed with centroids built from the others),
+    # prompts with a local handler that would still reach the network, and
+    # routing latency
+    from utils.embeddings import SentenceTransformerEmbeddings
+
+    corpus = load_corpus()
+    prompts = [prompt for prompt, _ in corpus]
+    labels = [intent for _, intent in corpus]
+    embeddings = SentenceTransformerEmbeddings(ROUTER_MODEL)
+    vectors = _normalize(embeddings.embed_documents(prompts))
+
+    results = {"keywords": [], "router": [], "routed": []}
+    for i, (prompt, label) in enumerate(corpus):
+        intents, centroids = intent_centroids(np.delete(vectors, i, axis=0), labels[:i] + labels[i + 1:])
+        routed, _ = nearest_intent(centroids @ vectors[i], intents)
+        keyword_intent = classify_intent(prompt)
+        combined = keyword_intent
+        if routed is not None and (keyword_intent == "unknown" or keyword_intent in NETWORK_INTENTS):
+            combined = routed
+        results["keywords"].append(keyword_intent)
+        results["router"].append(routed or "abstain")
+        results["routed"].append(combined)
+
+    for name, predicted in results.items():
+        correct = sum(p == label for p, label in zip(predicted, labels))
+        leaks = sum(p in NETWORK_INTENTS and label not in NETWORK_INTENTS for p, label in zip(predicted, labels))
+        print(f"{name:<9} accuracy {correct / len(corpus):6.1%}   local prompts sent to the network: {leaks}")
+    for prompt, label, got in zip(prompts, labels, results["routed"]):
+        if got != label:
+            print(f"  expected {label:<26} got {got:<26} {prompt}")
+
+    router = IntentRouter(embeddings, corpus)
+    latencies = [route_intent(prompt, router)["latency_ms"] for prompt in prompts * 5]
+    print(f"route_intent p50 {np.percentile(latencies, 50):.2f} ms, p95 {np.percentile(latencies, 95):.2f} ms"
+          f" (threshold {ROUTER_THRESHOLD}, margin {ROUTER_MARGIN})")
@@ -0,0 +1,109 @@
+# utils/lazy_imports.py
+import ast
+import importlib
+import os
+import subprocess
+import sys
+import types
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module that is imported on first attribute access.
+
+    Pages bind heavy optional libraries (matplotlib, fpdf, networkx, ...)
+    with ``lazy_import`` so a rerun that never draws a chart or builds a PDF
+    never pays for importing them. A missing dependency surfaces as the usual
+    ImportError at the point of use instead of breaking the whole page.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        if self._module is None:
+            self.__dict__["_module"] = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name):
+    """Module proxy for ``name``; already-imported modules are returned as is."""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+# --- Startup profiling ---
+def _startup_imports(path):
+    """Module-level import statements of a script, in order."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    return list(dict.fromkeys(
+        ast.unparse(node) for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom)) and not getattr(node, "level", 0)
+    ))
+
+
+def profile_imports(target):
+    """Import ``target`` in a fresh interpreter under ``-X importtime``.
+
+    ``target`` is a module name or a .py file (pages can't be imported by
+    name, so their module-level import statements are replayed instead).
+    Returns ``(rows, failed)``: rows are ``(module, self_us, cumulative_us)``
+    for the imports made directly by the target, slowest first; failed lists
+    the statements that raised (usually a dependency that isn't installed).
+    """
+    statements = _startup_imports(target) if target.endswith(".py") else [f"import {target}"]
+    script = "\n".join(
+        f"try:\n    {statement}\nexcept Exception:\n    print({statement!r})" for statement in statements
+    )
+    result = _run_importtime(script)
+    # Drop what the interpreter imports at startup (site, encodings, ...)
+    baseline = {name for name, _, _ in _top_level_rows(_run_importtime("pass").stderr)}
+    rows = [row for row in _top_level_rows(result.stderr) if row[0] not in baseline]
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows, result.stdout.splitlines()
+
+
+def _run_importtime(script):
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")]))}
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        capture_output=True, text=True, cwd=REPO_ROOT, env=env,
+    )
+
+
+def _top_level_rows(stderr):
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nested imports are indented; keep the ones the script triggered itself
+        if not name.startswith("  ", 1):
+            rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def format_profile(target, rows, failed, top=15):
+    total = sum(row[2] for row in rows)
+    lines = [f"{target}: {total / 1e6:.2f}s in {len(rows)} top-level imports"]
+    lines += [f"  {cumulative / 1e3:9.1f} ms  {name}" for name, _, cumulative in rows[:top]]
+    lines += [f"  failed: {statement}" for statement in failed]
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # python -m utils.lazy_imports main.py pages/6_Architecture.py utils.ai_assist
+    for target in sys.argv[1:] or ["main.py"]:
+        print(format_profile(target, *profile_imports(target)))
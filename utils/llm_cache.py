@@ -0,0 +1,116 @@
+# utils/llm_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import streamlit as st
+
+DEFAULT_CACHE_PATH = os.path.join("data", "llm_cache.db")
+DEFAULT_MAX_ENTRIES = 5_000
+DEFAULT_TTL = 30 * 24 * 3600  # recommendations go stale as products change
+
+
+def cache_key(model, temperature, prompt):
+    """Content address of one completion request."""
+    payload = json.dumps([model, float(temperature), prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """On-disk cache of LLM responses, shared by every session and restart.
+
+    Entries expire ``ttl`` seconds after they were written; once more than
+    ``max_entries`` are stored the least recently used are evicted.
+    ``hits``, ``misses``, ``expired`` and ``evictions`` count this process's
+    activity; ``stats()`` adds the stored entry count.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = self.misses = self.expired = self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT, response TEXT, created REAL, last_access REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def set(self, key, response, model=None):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, now, now),
+            )
+            excess = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+
+    def get_or_generate(self, model, temperature, prompt, generate):
+        """Cached response for this request, calling ``generate()`` on a miss.
+
+        Exceptions from ``generate`` propagate and nothing is stored, so
+        failures are retried on the next call.
+        """
+        key = cache_key(model, temperature, prompt)
+        response = self.get(key)
+        if response is None:
+            response = generate()
+            self.set(key, response, model)
+        return response
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
+
+
+@st.cache_resource
+def get_llm_cache():
+    """Process-wide cache; ``ITRM_LLM_CACHE_PATH`` overrides the location."""
+    return LLMCache(os.environ.get("ITRM_LLM_CACHE_PATH", DEFAULT_CACHE_PATH))
+
+
+def cached_llm_call(model, temperature, prompt, generate):
+    return get_llm_cache().get_or_generate(model, temperature, prompt, generate)
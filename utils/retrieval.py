@@ -0,0 +1,157 @@
+# utils/retrieval.py
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, List
+
+import numpy as np
+from langchain_core.retrievers import BaseRetriever
+
+DEFAULT_K = 5
+QUERY_CACHE_SIZE = 1_024
+# Cosine similarity at which two different questions share retrieval
+# results. Off (1.0) by default: templated prompts that differ only in a
+# component or vendor name embed well above 0.98 of each other, yet need
+# different context. Only enable it for free-text traffic where it's been
+# checked against real queries.
+NEAR_DUPLICATE_SIMILARITY = float(os.environ.get("ITRM_NEAR_DUPLICATE_SIMILARITY", 1.0))
+
+
+def normalize_query(query):
+    """Cache key for a question: case, spacing and trailing punctuation don't matter."""
+    return re.sub(r"[\s?.!]+$", "", " ".join(query.lower().split()))
+
+
+class _LRU:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+
+    def get(self, key):
+        if key in self._items:
+            self._items.move_to_end(key)
+            return self._items[key]
+        return None
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def items(self):
+        return list(self._items.items())
+
+    def __len__(self):
+        return len(self._items)
+
+
+class IndexRetriever:
+    """Top-k retrieval over one loaded FAISS store, with caches.
+
+    Query vectors are cached by normalised question text, and results by
+    (question, k). With ``near_duplicate`` below 1, a question whose vector
+    is at least that similar to a cached one reuses that one's results. ``search_many`` embeds every uncached
+    question in one request and runs one vectorised FAISS search for all
+    of them. Build one per index version; the caches assume it won't change.
+    """
+
+    def __init__(self, vectorstore, cache_size=QUERY_CACHE_SIZE, near_duplicate=NEAR_DUPLICATE_SIMILARITY):
+        self.vectorstore = vectorstore
+        self.near_duplicate = near_duplicate
+        self._vectors = _LRU(cache_size)
+        self._results = _LRU(cache_size)
+        self._lock = threading.Lock()
+        self._search_params = None
+        if hasattr(vectorstore, "index_to_docstore_id"):
+            from utils.ann_index import search_params
+            # Skips vectors of deleted documents still in an HNSW graph
+            self._search_params = search_params(vectorstore.index, vectorstore.index_to_docstore_id)
+        self.stats = {"result_hits": 0, "near_duplicate_hits": 0, "embedding_hits": 0, "searches": 0}
+
+    def _embed(self, queries):
+        embeddings = self.vectorstore.embedding_function
+        if hasattr(embeddings, "embed_queries"):
+            return embeddings.embed_queries(queries)
+        return np.asarray([embeddings.embed_query(query) for query in queries], dtype=np.float32)
+
+    def _near_duplicate(self, vector, k):
+        if self.near_duplicate >= 1:
+            return None
+        # Candidates are the cached results (at most cache_size), so this is
+        # one small matrix-vector product
+        candidates = [
+            (docs, self._vectors.get(key)) for (cached_k, key), docs in self._results.items() if cached_k == k
+        ]
+        candidates = [(docs, other) for docs, other in candidates if other is not None]
+        if not candidates:
+            return None
+        matrix = np.stack([other for _, other in candidates])
+        sims = matrix @ vector / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(vector) + 1e-12)
+        best = int(np.argmax(sims))
+        return candidates[best][0] if sims[best] >= self.near_duplicate else None
+
+    def search_many(self, queries: List[str], k: int = DEFAULT_K):
+        """Documents for each question, in order."""
+        keys = [normalize_query(query) for query in queries]
+        results = {}
+        with self._lock:
+            for key in keys:
+                cached = self._results.get((k, key))
+                if cached is not None:
+                    results[key] = cached
+            self.stats["result_hits"] += len(results)
+            pending = [key for key in dict.fromkeys(keys) if key not in results]
+            vectors = {key: self._vectors.get(key) for key in pending}
+            to_embed = [key for key, vector in vectors.items() if vector is None]
+            self.stats["embedding_hits"] += len(pending) - len(to_embed)
+
+        if to_embed:
+            originals = {key: query for key, query in zip(keys, queries)}
+            for key, vector in zip(to_embed, self._embed([originals[key] for key in to_embed])):
+                vectors[key] = np.asarray(vector, dtype=np.float32)
+
+        with self._lock:
+            for key in pending:
+                self._vectors.put(key, vectors[key])
+            to_search = []
+            for key in pending:
+                reused = self._near_duplicate(vectors[key], k)
+                if reused is not None:
+                    results[key] = reused
+                    self._results.put((k, key), reused)
+                    self.stats["near_duplicate_hits"] += 1
+                else:
+                    to_search.append(key)
+
+        if to_search:
+            store = self.vectorstore
+            queries = np.stack([vectors[key] for key in to_search])
+            if self._search_params is not None:
+                _, rows = store.index.search(queries, k, params=self._search_params)
+            else:
+                _, rows = store.index.search(queries, k)
+            mapping = store.index_to_docstore_id
+            with self._lock:
+                self.stats["searches"] += 1
+                for key, row in zip(to_search, rows):
+                    docs = [store.docstore.search(mapping[i]) for i in row if i in mapping]
+                    results[key] = docs
+                    self._results.put((k, key), docs)
+        return [results[key] for key in keys]
+
+    def search(self, query: str, k: int = DEFAULT_K):
+        return self.search_many([query], k)[0]
+
+    def as_retriever(self, k: int = DEFAULT_K):
+        return CachedRetriever(search=lambda query: self.search(query, k))
+
+
+class CachedRetriever(BaseRetriever):
+    """LangChain retriever over an IndexRetriever, so chains get the caches."""
+
+    search: Callable[[str], list]
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        return self.search(query)
@@ -1,11 +1,11 @@
 # utils/supabase_client.py
 import streamlit as st
-from supabase import create_client
 
 @st.cache_resource
 def get_supabase():
+    # Imported here so offline backends don't need the supabase package
+    from supabase import create_client
+
     url = st.secrets["supabase"]["url"]
     key = st.secrets["supabase"]["key"]
     return create_client(url, key)
-
-supabase = get_supabase()
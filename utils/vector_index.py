@@ -1,58 +1,378 @@
+import hashlib
+import json
 import os
+import threading
+import numpy as np
 import streamlit as st
 import pandas as pd
-from typing import List
+from typing import Dict, List
 
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain.vectorstores import FAISS
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.schema import Document
-from langchain.chains import RetrievalQA
+from utils.ann_index import add_vectors, build_index, index_kind, needs_rebuild, remove_vectors, set_search_params
+
+# LangChain, FAISS and the embedding model are imported/built on first use;
+# pages import this module for answer_with_code_context and shouldn't pay for
+# them on every rerun.
 
 # --- Load API Key Safely ---
-openai_key = st.secrets.get("openai_api_key") or st.secrets.get("openai", {}).get("api_key")
-if not openai_key:
-    raise KeyError("OpenAI API key is missing. Please configure it in the Streamlit secrets.")
+def _openai_key():
+    openai_key = st.secrets.get("openai_api_key") or st.secrets.get("openai", {}).get("api_key")
+    if not openai_key:
+        raise KeyError("OpenAI API key is missing. Please configure it in the Streamlit secrets.")
+    return openai_key
 
 USE_HUGGINGFACE = False  # Change to True for local dev
 
-if USE_HUGGINGFACE:
-    embedding_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-else:
-    embedding_model = OpenAIEmbeddings(openai_api_key=openai_key)
+# "openai", or "local" for offline CPU embeddings with sentence-transformers
+EMBEDDING_PROVIDER = os.environ.get("ITRM_EMBEDDINGS", "local" if USE_HUGGINGFACE else "openai").lower()
+OPENAI_EMBEDDING_MODEL = "text-embedding-ada-002"
+LOCAL_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+@st.cache_resource(show_spinner=False)
+def get_embedding_model():
+    """Embeddings for the configured provider, batched and cached on disk
+    (data/embedding_cache) so re-indexing unchanged chunks costs nothing."""
+    from utils.embeddings import CachedEmbeddings, SentenceTransformerEmbeddings
+    if EMBEDDING_PROVIDER == "local":
+        # One model on one CPU: parallel batches would only contend
+        return CachedEmbeddings(SentenceTransformerEmbeddings(LOCAL_EMBEDDING_MODEL), LOCAL_EMBEDDING_MODEL, max_concurrency=1)
+    from langchain_openai import OpenAIEmbeddings
+    base = OpenAIEmbeddings(model=OPENAI_EMBEDDING_MODEL, openai_api_key=_openai_key())
+    return CachedEmbeddings(base, OPENAI_EMBEDDING_MODEL)
 
 VECTOR_INDEX_PATH = "vector_store/faiss_index"
 
-# --- Initialize vector store (in-memory or persisted) ---
 # --- Initialize the text splitter ---
-text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=50)
+@st.cache_resource(show_spinner=False)
+def get_text_splitter():
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    return RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=50)
+
+def __getattr__(name):
+    # Backwards compatibility for the old module-level objects
+    if name == "embedding_model":
+        return get_embedding_model()
+    if name == "text_splitter":
+        return get_text_splitter()
+    if name == "openai_key":
+        return _openai_key()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def build_vector_index(docs: List[str], save_path: str = VECTOR_INDEX_PATH):
-    chunks = text_splitter.create_documents(docs)
-    vectorstore = FAISS.from_documents(chunks, embedding_model)
-    vectorstore.save_local(save_path)
+    from langchain.vectorstores import FAISS
+    chunks = get_text_splitter().create_documents(docs)
+    vectorstore = FAISS.from_documents(chunks, get_embedding_model())
+    if needs_rebuild(vectorstore.index, len(vectorstore.index_to_docstore_id)):
+        _rebuild_index(vectorstore)
+    _save_index(vectorstore, save_path)
+    # These chunks have no sources, so an existing manifest no longer applies
+    if os.path.exists(_manifest_path(save_path)):
+        os.remove(_manifest_path(save_path))
+    # Drop loaded copies of older indexes; the next load picks up this one
+    _clear_loaded_indexes()
     return vectorstore
 
 # --- Load vector index ---
+# Files LangChain's FAISS.save_local writes into the index folder
+INDEX_FILES = ("index.faiss", "index.pkl")
+
+def _save_index(vectorstore, path: str):
+    """save_local into a temporary folder, then rename each file into place.
+
+    Loaded indexes are memory-mapped, and rewriting index.faiss in place
+    would truncate the pages a live reader has mapped (a bus error, not an
+    exception). Renaming leaves the old file's inode intact until the last
+    reader lets go of it.
+    """
+    import shutil
+    import tempfile
+    os.makedirs(path, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".index-", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        vectorstore.save_local(tmp_dir)
+        for name in INDEX_FILES:
+            os.replace(os.path.join(tmp_dir, name), os.path.join(path, name))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def _index_signature(path: str):
+    """(mtime, size) of each saved index file, or None if the index is missing."""
+    try:
+        return tuple(
+            (stat.st_mtime_ns, stat.st_size)
+            for stat in (os.stat(os.path.join(path, name)) for name in INDEX_FILES)
+        )
+    except FileNotFoundError:
+        return None
+
+def _read_faiss_index(file_path: str):
+    import faiss
+    # Memory-map the index so large ones are paged in on demand rather than
+    # copied into RAM; index types without mmap support are read normally
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+    try:
+        return faiss.read_index(file_path, flags)
+    except RuntimeError:
+        return faiss.read_index(file_path)
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _load_vector_index(path: str, signature):
+    import pickle
+    from langchain.vectorstores import FAISS
+
+    index = set_search_params(_read_faiss_index(os.path.join(path, "index.faiss")))
+    with open(os.path.join(path, "index.pkl"), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    return FAISS(get_embedding_model(), index, docstore, index_to_docstore_id)
+
 def load_vector_index(path: str = VECTOR_INDEX_PATH):
-    return FAISS.load_local(path, embeddings=embedding_model, allow_dangerous_deserialization=True)
+    """FAISS store for ``path``, shared by every session.
+
+    Loaded once per process and reloaded only when the files on disk change
+    (the cache is keyed by their mtime and size). Treat it as read-only, and
+    search it through get_index_retriever: an HNSW index may still hold
+    vectors of deleted documents, which LangChain's own search doesn't skip.
+    """
+    return _load_vector_index(path, _require_index(path))
+
+def _require_index(path: str):
+    signature = _index_signature(path)
+    if signature is None:
+        raise FileNotFoundError(f"No vector index at {path}")
+    return signature
+
+# --- Retrieval and QA chain, one per loaded index ---
+RETRIEVAL_K = 5
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _index_retriever(path: str, signature):
+    from utils.retrieval import IndexRetriever
+    return IndexRetriever(_load_vector_index(path, signature))
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _qa_chain(path: str, signature, k: int):
+    from langchain.chains import RetrievalQA
+    from utils.ai_assist import get_llm
+    return RetrievalQA.from_chain_type(
+        llm=get_llm(), chain_type="stuff", retriever=_index_retriever(path, signature).as_retriever(k)
+    )
+
+def get_index_retriever(path: str = VECTOR_INDEX_PATH):
+    """Cached top-k retrieval over the current index (see utils.retrieval)."""
+    return _index_retriever(path, _require_index(path))
+
+def get_qa_chain(path: str = VECTOR_INDEX_PATH, k: int = RETRIEVAL_K):
+    """RetrievalQA chain over the current index, built once and reused until
+    the index on disk changes. Its retriever goes through the query caches."""
+    return _qa_chain(path, _require_index(path), k)
+
+def _clear_loaded_indexes():
+    _load_vector_index.clear()
+    _index_retriever.clear()
+    _qa_chain.clear()
+
+# --- Index type (flat / IVF-PQ / HNSW, see utils.ann_index) ---
+def _embed_array(texts: List[str]):
+    embeddings = get_embedding_model()
+    if hasattr(embeddings, "embed_array"):
+        return embeddings.embed_array(texts)
+    return np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+
+def _rebuild_index(vectorstore):
+    """Replace the store's FAISS index with one of the configured type.
+
+    Vectors come from the embedding cache, so nothing already embedded is
+    paid for again; IVF-PQ is retrained on a sample of them.
+    """
+    # Live documents only (HNSW tombstones are left behind), renumbered densely
+    doc_ids = [doc_id for _, doc_id in sorted(vectorstore.index_to_docstore_id.items())]
+    vectorstore.index_to_docstore_id = dict(enumerate(doc_ids))
+    if not doc_ids:
+        vectorstore.index.reset()
+        return
+    texts = [vectorstore.docstore.search(doc_id).page_content for doc_id in doc_ids]
+    vectorstore.index = build_index(_embed_array(texts))
+
+def _delete_documents(vectorstore, ids):
+    """Remove documents without renumbering the others.
+
+    LangChain's FAISS.delete assumes remove_ids renumbers rows the way a flat
+    index does; IVF keeps ids as they are and HNSW can't remove at all, so
+    for those the vectors are removed by id (IVF) or left as tombstones
+    (HNSW, see ann_index.search_params) and the mapping just loses them.
+    """
+    if index_kind(vectorstore.index) == "flat":
+        vectorstore.delete(list(ids))
+        return
+    ids = set(ids)
+    positions = [i for i, doc_id in vectorstore.index_to_docstore_id.items() if doc_id in ids]
+    remove_vectors(vectorstore.index, positions)
+    for i in positions:
+        del vectorstore.index_to_docstore_id[i]
+    vectorstore.docstore.delete(list(ids))
+
+def _add_documents(vectorstore, docs, ids):
+    if index_kind(vectorstore.index) == "flat":
+        vectorstore.add_documents(docs, ids=ids)
+        return
+    mapping = vectorstore.index_to_docstore_id
+    positions = add_vectors(vectorstore.index, _embed_array([doc.page_content for doc in docs]), max(mapping, default=-1) + 1)
+    vectorstore.docstore.add(dict(zip(ids, docs)))
+    mapping.update(zip(positions, ids))
+
+# --- Incremental indexing ---
+# manifest.json next to the index records, per source, the content hash and
+# the ids of its chunks, so a refresh only re-embeds what changed.
+MANIFEST_FILE = "manifest.json"
+EXCLUDED_DIRS = {".git", ".venv", "venv", "__pycache__", "vector_store", "node_modules", "data"}
+SOURCE_EXTENSIONS = (".py", ".md", ".txt")
+
+_update_lock = threading.Lock()
+
+def _manifest_path(path: str):
+    return os.path.join(path, MANIFEST_FILE)
+
+def load_manifest(path: str = VECTOR_INDEX_PATH):
+    """``{source: {"hash", "chunk_ids", "file", "mtime_ns", "size"}}``; empty if none."""
+    try:
+        with open(_manifest_path(path), encoding="utf-8") as f:
+            return json.load(f)["sources"]
+    except (FileNotFoundError, KeyError, ValueError):
+        return {}
+
+def _save_manifest(path: str, sources):
+    tmp_path = _manifest_path(path) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "sources": sources}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, _manifest_path(path))
+
+def _content_hash(text: str):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def discover_source_files(root: str = "."):
+    """Code and docs under ``root``, skipping VCS, virtualenv and generated folders."""
+    file_paths = []
+    for dirpath, dirnames, files in os.walk(root):
+        # Prune in place so excluded trees are never walked
+        dirnames[:] = sorted(d for d in dirnames if d not in EXCLUDED_DIRS and not d.startswith("."))
+        file_paths.extend(os.path.join(dirpath, name) for name in sorted(files) if name.endswith(SOURCE_EXTENSIONS))
+    return file_paths
+
+def update_vector_index(files: List[str] = (), uploads: Dict[str, str] = None, save_path: str = VECTOR_INDEX_PATH):
+    """Bring the index up to date with ``files`` (paths) and ``uploads``
+    (name -> text) without re-embedding unchanged sources.
+
+    Files whose size and mtime match the manifest aren't even read; otherwise
+    a source is re-chunked and re-embedded only if its content hash changed.
+    Indexed files that no longer exist on disk are removed. Returns counts of
+    added / updated / unchanged / removed sources and chunks embedded.
+    """
+    from langchain.vectorstores import FAISS
+
+    stats = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0, "chunks": 0, "errors": []}
+    with _update_lock:
+        manifest = load_manifest(save_path)
+        has_index = bool(manifest) and _index_signature(save_path) is not None
+        if not has_index:
+            # No manifest means an index built from anonymous text: start over
+            manifest = {}
+
+        changed = {}
+        for path in files:
+            try:
+                stat = os.stat(path)
+                entry = manifest.get(path)
+                if entry and (entry.get("mtime_ns"), entry.get("size")) == (stat.st_mtime_ns, stat.st_size):
+                    stats["unchanged"] += 1
+                    continue
+                with open(path, "r", encoding="utf-8") as f:
+                    changed[path] = (f.read(), {"file": True, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size})
+            except (OSError, UnicodeDecodeError) as e:
+                stats["errors"].append(f"{path}: {e}")
+        for name, text in (uploads or {}).items():
+            changed[name] = (text, {"file": False})
+
+        stale_ids, chunks, chunk_ids = [], [], []
+        splitter = get_text_splitter()
+        for source, (text, info) in changed.items():
+            content_hash = _content_hash(text)
+            entry = manifest.get(source)
+            if entry and entry["hash"] == content_hash:
+                # Touched but not edited: just record the new mtime
+                entry.update(info)
+                stats["unchanged"] += 1
+                continue
+            if entry:
+                stale_ids.extend(entry["chunk_ids"])
+            docs = splitter.create_documents([text], metadatas=[{"source": source}])
+            ids = [f"{source}#{i}@{content_hash[:12]}" for i in range(len(docs))]
+            chunks.extend(docs)
+            chunk_ids.extend(ids)
+            manifest[source] = {"hash": content_hash, "chunk_ids": ids, **info}
+            stats["updated" if entry else "added"] += 1
+
+        for source in [s for s, entry in manifest.items() if entry.get("file") and not os.path.exists(s)]:
+            stale_ids.extend(manifest.pop(source)["chunk_ids"])
+            stats["removed"] += 1
+
+        vectorstore = None
+        if has_index and (chunks or stale_ids):
+            # A private, writable copy; the shared cached one is read-only
+            vectorstore = FAISS.load_local(save_path, get_embedding_model(), allow_dangerous_deserialization=True)
+            set_search_params(vectorstore.index)
+            if stale_ids:
+                _delete_documents(vectorstore, stale_ids)
+        if chunks:
+            if vectorstore is None:
+                vectorstore = FAISS.from_documents(chunks, get_embedding_model(), ids=chunk_ids)
+            else:
+                _add_documents(vectorstore, chunks, chunk_ids)
+        stats["chunks"] = len(chunks)
+        # Switch type once the corpus is big enough (or the setting changed),
+        # retrain IVF-PQ when the corpus has drifted far from the size its
+        # centroids were trained for, and compact HNSW with many tombstones
+        if vectorstore is not None and needs_rebuild(vectorstore.index, len(vectorstore.index_to_docstore_id)):
+            _rebuild_index(vectorstore)
+            stats["rebuilt"] = index_kind(vectorstore.index)
+
+        if vectorstore is not None:
+            _save_index(vectorstore, save_path)
+            _clear_loaded_indexes()
+        if has_index or vectorstore is not None:
+            _save_manifest(save_path, manifest)
+    return stats
 
 # --- Ask AI with context from indexed code/doc chunks ---
 def answer_with_code_context(query: str):
-    if not os.path.exists(VECTOR_INDEX_PATH):
+    if _index_signature(VECTOR_INDEX_PATH) is None:
         return "Vector index not found. Please build it first from your code or documentation."
     
-    vectorstore = load_vector_index()
-    retriever = vectorstore.as_retriever(search_type="similarity", search_kwargs={"k": 5})
-    qa = RetrievalQA.from_chain_type(llm=ChatOpenAI(temperature=0, api_key=openai_key), chain_type="stuff", retriever=retriever)
-    return qa.run(query)
+    return get_qa_chain().invoke({"query": query})["result"]
+
+def answer_many_with_code_context(queries: List[str]):
+    """``(answer, error)`` for each question, in order.
+
+    All questions are retrieved with one batched embedding request and one
+    vectorised search; the LLM calls then run concurrently, and each chain's
+    retriever is served from the results just cached.
+    """
+    from utils.fanout import fan_out
+
+    if _index_signature(VECTOR_INDEX_PATH) is None:
+        missing = "Vector index not found. Please build it first from your code or documentation."
+        return [(missing, None) for _ in queries]
+    get_index_retriever().search_many(queries, RETRIEVAL_K)
+    chain = get_qa_chain()
+    answers = [(None, None)] * len(queries)
+    for i, result, error in fan_out(lambda query: chain.invoke({"query": query})["result"], queries):
+        answers[i] = (result, error)
+    return answers
 
 # --- Utility to preview what was indexed ---
 def preview_indexed_docs(path: str = VECTOR_INDEX_PATH):
-    if not os.path.exists(path):
+    if _index_signature(path) is None:
         return []
-    vectorstore = load_vector_index()
-    return vectorstore.docstore._dict.values()
+    vectorstore = load_vector_index(path)
+    return list(vectorstore.docstore._dict.values())
 
 # --- New: Get system-level component groups ---
 def get_components_by_system(system_name: str, components: List[dict]):